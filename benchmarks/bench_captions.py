@@ -0,0 +1,55 @@
+""" Benchmark the streaming caption writers against building a webvtt object.
+
+Run from the repository root:
+
+    PYTHONPATH=. python benchmarks/bench_captions.py
+"""
+
+import os
+import tempfile
+import tracemalloc
+from time import perf_counter
+
+import tscribe
+from synthetic import make_transcript
+
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def write_webvtt(transcript, filename):
+    """The previous approach, a webvtt.Caption per segment saved at the end"""
+    import webvtt
+
+    vtt = webvtt.WebVTT()
+    for start, end, speaker, lines in tscribe.iter_cues(transcript["segments"]):
+        caption = webvtt.Caption(start, end, lines)
+        if speaker:
+            caption.identifier = speaker
+        vtt.captions.append(caption)
+    vtt.save(filename)
+
+
+def main():
+    print(f"{'items':>10} {'writer':>10} {'seconds':>10} {'peak MB':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            data = make_transcript(size, mode="speaker")
+            transcript = tscribe.decode_transcript(data)
+            for name, writer, suffix in [
+                ("webvtt", write_webvtt, ".vtt"),
+                ("vtt", tscribe.write_vtt, ".vtt"),
+                ("srt", tscribe.write_srt, ".srt"),
+            ]:
+                filename = os.path.join(directory, name + suffix)
+                tracemalloc.start()
+                start = perf_counter()
+                writer(transcript, filename)
+                duration = perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+                tracemalloc.stop()
+                print(f"{size:>10} {name:>10} {duration:>10.2f} {peak:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
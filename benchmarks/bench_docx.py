@@ -0,0 +1,37 @@
+""" Benchmark the bulk xml docx writer against python-docx runs per word.
+
+Run from the repository root:
+
+    PYTHONPATH=. python benchmarks/bench_docx.py
+"""
+
+import os
+import tempfile
+import zipfile
+from time import perf_counter
+
+import tscribe
+from synthetic import make_transcript
+
+
+SIZES = [1_000, 10_000, 50_000]
+
+
+def main():
+    print(f"{'items':>10} {'backend':>12} {'seconds':>10} {'document.xml':>14}")
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "bench.docx")
+        for size in SIZES:
+            transcript = tscribe.decode_transcript(make_transcript(size, mode="speaker"))
+            for fast_docx in [False, True]:
+                start = perf_counter()
+                tscribe.write_docx(transcript, filename, fast_docx=fast_docx)
+                duration = perf_counter() - start
+                with zipfile.ZipFile(filename) as package:
+                    xml_size = package.getinfo("word/document.xml").file_size
+                backend = "bulk xml" if fast_docx else "python-docx"
+                print(f"{size:>10} {backend:>12} {duration:>10.2f} {xml_size:>14}")
+
+
+if __name__ == "__main__":
+    main()
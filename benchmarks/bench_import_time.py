@@ -0,0 +1,69 @@
+""" Benchmark the cold import time of tscribe with python -X importtime.
+
+Run from the repository root:
+
+    PYTHONPATH=. python benchmarks/bench_import_time.py [budget_ms]
+
+Exits with status 1 when the cumulative import time exceeds the budget.
+"""
+
+import subprocess
+import sys
+
+
+BUDGET_MS = 120
+HEAVY_MODULES = [
+    "docx",
+    "matplotlib",
+    "pandas",
+    "webvtt",
+    "urllib.request",
+    "http.client",
+    "email",
+]
+
+
+def measure_import_time() -> dict:
+    """Return cumulative import time in microseconds per module imported"""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import tscribe"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    timings = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Nested imports are indented, and included too so eager ones show up
+        name = name.strip()
+        try:
+            timings[name] = int(cumulative)
+        except ValueError:
+            continue
+
+    return timings
+
+
+def main():
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MS
+    timings = measure_import_time()
+
+    for name, cumulative in sorted(timings.items(), key=lambda x: -x[1])[:10]:
+        print(f"{name:>30} {cumulative / 1000:>10.1f} ms")
+
+    heavy = [x for x in HEAVY_MODULES if x in timings]
+    if heavy:
+        print(f"Heavy modules imported eagerly: {', '.join(heavy)}")
+        sys.exit(1)
+
+    total_ms = timings["tscribe"] / 1000
+    print(f"import tscribe: {total_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+    if total_ms > budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+""" Benchmark the json backends on the sample files, scaled up.
+
+Run from the repository root:
+
+    PYTHONPATH=. python benchmarks/bench_json.py [scale]
+
+Each sample's items, speaker segments and channel items are repeated scale
+times, 200 by default, and loaded with every installed backend.
+"""
+
+import glob
+import json
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+import tscribe
+
+
+def scale_up(data: dict, scale: int) -> dict:
+    """Repeat the lists of results that grow with the length of a recording"""
+    results = data["results"]
+    results["items"] = results["items"] * scale
+    if "speaker_labels" in results:
+        segments = results["speaker_labels"]["segments"]
+        results["speaker_labels"]["segments"] = segments * scale
+    if "channel_labels" in results:
+        for channel in results["channel_labels"]["channels"]:
+            channel["items"] = channel["items"] * scale
+    if "segments" in results:
+        results["segments"] = results["segments"] * scale
+    return data
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    backends = []
+    for backend in tscribe.JSON_BACKENDS:
+        try:
+            tscribe.json_loads(backend)
+            backends.append(backend)
+        except ImportError:
+            print(f"{backend} is not installed")
+
+    print(f"{'sample':>40} {'MB':>6}" + "".join(f"{x:>10}" for x in backends))
+    totals = dict.fromkeys(backends, 0.0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for sample in sorted(glob.glob("sample_material/*.json")):
+            with open(sample, "rb") as file:
+                data = scale_up(json.loads(file.read()), scale)
+            filepath = os.path.join(directory, os.path.basename(sample))
+            with open(filepath, "w", encoding="utf-8") as file:
+                json.dump(data, file)
+            del data
+
+            size_mb = os.path.getsize(filepath) / 1024 ** 2
+            row = f"{os.path.basename(sample)[:40]:>40} {size_mb:>6.1f}"
+            for backend in backends:
+                start = perf_counter()
+                tscribe.load_json_as_dict(filepath, backend=backend)
+                duration = perf_counter() - start
+                totals[backend] += duration
+                row += f"{duration:>10.3f}"
+            print(row)
+            os.remove(filepath)
+
+    total = "".join(f"{totals[x]:>10.2f}" for x in backends)
+    print(f"{'total seconds':>40} {'':>6}" + total)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+""" Benchmark speaker_labels decoding as transcripts grow.
+
+Run from the repository root:
+
+    PYTHONPATH=. python benchmarks/bench_speaker_decoding.py
+"""
+
+from time import perf_counter
+
+import tscribe
+from synthetic import make_transcript
+
+
+SIZES = [1_000, 10_000, 50_000, 100_000, 500_000]
+
+
+def main():
+    print(f"{'items':>10} {'seconds':>10} {'us/item':>10}")
+    for size in SIZES:
+        data = make_transcript(size, mode="speaker")
+        start = perf_counter()
+        tscribe.decode_transcript_to_dataframe(data)
+        duration = perf_counter() - start
+        print(f"{size:>10} {duration:>10.3f} {duration / size * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+""" Benchmark peak memory of loading versus streaming a large transcript.
+
+Run from the repository root:
+
+    PYTHONPATH=. python benchmarks/bench_stream_memory.py [n_items] [mode]
+
+Defaults to 5,000,000 items with speaker_labels and alternative results.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+
+from synthetic import write_transcript
+
+
+MEASURE = """
+import resource, sys, tscribe
+if sys.argv[2] == "stream":
+    data = tscribe.load_json_as_stream(sys.argv[1])
+else:
+    data = tscribe.load_json_as_dict(sys.argv[1])
+transcript = tscribe.decode_transcript(data)
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def main():
+    n_items = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    mode = sys.argv[2] if len(sys.argv) > 2 else "speaker"
+
+    with tempfile.TemporaryDirectory() as directory:
+        filepath = os.path.join(directory, "synthetic.json")
+        write_transcript(filepath, n_items, mode=mode)
+        size_mb = os.path.getsize(filepath) / 1024 ** 2
+        print(f"{n_items} items, {mode}, {size_mb:.0f} MB of json")
+
+        for method in ["load", "stream"]:
+            start = perf_counter()
+            process = subprocess.run(
+                [sys.executable, "-c", MEASURE, filepath, method],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            duration = perf_counter() - start
+            peak_mb = int(process.stdout.strip()) / 1024
+            print(f"{method:>8} {peak_mb:>10.0f} MB peak {duration:>10.1f} s")
+
+
+if __name__ == "__main__":
+    main()
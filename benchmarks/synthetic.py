@@ -0,0 +1,205 @@
+""" Generate synthetic AWS Transcribe results for benchmarking. """
+
+import json
+import random
+
+
+WORDS = ["the", "quick", "brown", "fox", "jumps", "over", "a", "lazy", "dog"]
+
+
+def generate_items(n_items: int, seed: int = 0):
+    """Yield roughly n_items pronunciation and punctuation items"""
+
+    rng = random.Random(seed)
+    count = 0
+    time = 0.0
+
+    while count < n_items:
+        start = round(time, 2)
+        time += rng.uniform(0.1, 0.6)
+        end = round(time, 2)
+        count += 1
+        yield {
+            "start_time": str(start),
+            "end_time": str(end),
+            "alternatives": [
+                {
+                    "confidence": str(round(rng.uniform(0.5, 1.0), 4)),
+                    "content": rng.choice(WORDS),
+                }
+            ],
+            "type": "pronunciation",
+        }
+        if rng.random() < 0.1:
+            count += 1
+            yield {
+                "alternatives": [{"confidence": "0.0", "content": "."}],
+                "type": "punctuation",
+            }
+
+
+def generate_speaker_segments(items):
+    """Yield speaker_labels segments of 20 words, alternating speakers"""
+
+    chunk = []
+    label = "spk_0"
+
+    def segment():
+        return {
+            "start_time": chunk[0]["start_time"],
+            "end_time": chunk[-1]["end_time"],
+            "speaker_label": label,
+            "items": [
+                {
+                    "start_time": i["start_time"],
+                    "end_time": i["end_time"],
+                    "speaker_label": label,
+                }
+                for i in chunk
+            ],
+        }
+
+    for item in items:
+        if item["type"] != "pronunciation":
+            continue
+        chunk.append(item)
+        if len(chunk) == 20:
+            yield segment()
+            chunk = []
+            label = "spk_1" if label == "spk_0" else "spk_0"
+
+    if chunk:
+        yield segment()
+
+
+def generate_channel_items(items, channel: str):
+    """Yield the items of one channel, switching channel every 20 words"""
+
+    label = "ch_1"
+    words = 0
+    for item in items:
+        if item["type"] == "pronunciation":
+            if words % 20 == 0:
+                label = "ch_1" if label == "ch_0" else "ch_0"
+            words += 1
+        if label == channel:
+            yield item
+
+
+def generate_alternative_segments(items):
+    """Yield alternative-results segments of 20 words, as in 04-alternative-results"""
+
+    chunk = []
+
+    def segment():
+        return {
+            "start_time": chunk[0]["start_time"],
+            "end_time": chunk[-1]["end_time"],
+            "alternatives": [
+                {
+                    "transcript": " ".join(
+                        i["alternatives"][0]["content"] for i in chunk
+                    ),
+                    "items": [
+                        {
+                            "start_time": i["start_time"],
+                            "end_time": i["end_time"],
+                            "confidence": i["alternatives"][0]["confidence"],
+                            "content": i["alternatives"][0]["content"],
+                            "type": "pronunciation",
+                        }
+                        for i in chunk
+                    ],
+                }
+            ],
+        }
+
+    for item in items:
+        if item["type"] != "pronunciation":
+            continue
+        chunk.append(item)
+        if len(chunk) == 20:
+            yield segment()
+            chunk = []
+
+    if chunk:
+        yield segment()
+
+
+def make_transcript(n_items: int, mode: str = "speaker", seed: int = 0) -> dict:
+    """Build a transcript dict of roughly n_items items
+
+    mode is one of "plain", "speaker" or "channel".
+    """
+
+    items = list(generate_items(n_items, seed))
+    results = {"transcripts": [{"transcript": ""}], "items": items}
+
+    if mode == "speaker":
+        results["speaker_labels"] = {
+            "speakers": 2,
+            "segments": list(generate_speaker_segments(items)),
+        }
+
+    elif mode == "channel":
+        results["channel_labels"] = {
+            "channels": [
+                {"channel_label": label, "items": list(generate_channel_items(items, label))}
+                for label in ("ch_0", "ch_1")
+            ],
+            "number_of_channels": 2,
+        }
+
+    return {
+        "jobName": "synthetic",
+        "accountId": "XXXXXXXXXXXX",
+        "results": results,
+        "status": "COMPLETED",
+    }
+
+
+def write_transcript(
+    filepath, n_items: int, mode: str = "speaker", alternatives: bool = True, seed=0
+):
+    """Write a transcript of roughly n_items items without holding it in memory
+
+    With alternatives, results also carry segments as in 04-alternative-results.
+    """
+
+    def write_array(file, values):
+        file.write("[")
+        for position, value in enumerate(values):
+            if position:
+                file.write(",")
+            file.write(json.dumps(value))
+        file.write("]")
+
+    with open(filepath, "w", encoding="utf-8") as file:
+        file.write('{"jobName": "synthetic", "accountId": "XXXXXXXXXXXX", ')
+        file.write('"results": {"transcripts": [{"transcript": ""}], ')
+
+        if mode == "speaker":
+            file.write('"speaker_labels": {"speakers": 2, "segments": ')
+            write_array(file, generate_speaker_segments(generate_items(n_items, seed)))
+            file.write("}, ")
+
+        elif mode == "channel":
+            file.write('"channel_labels": {"channels": [')
+            for position, label in enumerate(("ch_0", "ch_1")):
+                if position:
+                    file.write(",")
+                file.write(f'{{"channel_label": "{label}", "items": ')
+                write_array(
+                    file, generate_channel_items(generate_items(n_items, seed), label)
+                )
+                file.write("}")
+            file.write('], "number_of_channels": 2}, ')
+
+        file.write('"items": ')
+        write_array(file, generate_items(n_items, seed))
+
+        if alternatives:
+            file.write(', "segments": ')
+            write_array(file, generate_alternative_segments(generate_items(n_items, seed)))
+
+        file.write('}, "status": "COMPLETED"}')
@@ -1,19 +1,26 @@
+import re
 import setuptools
 
 with open("README.md", "r") as f:
     long_description = f.read()
 
+# Single source of the version, read rather than imported before install
+with open("tscribe/__init__.py", "r") as f:
+    version = re.search(r'^__version__ = "(.+)"$', f.read(), re.M).group(1)
+
 setuptools.setup(
     name="tscribe",
-    version="1.3.1",
+    version=version,
     author="Robert Williams",
     author_email="robertedwardwilliams@me.com",
-    description="Produce Word Document, CSV, SQLite and VTT transcriptions using the automatic speech recognition from AWS Transcribe.",
+    description="Produce Word Document, CSV, SQLite, VTT and SRT transcriptions using the automatic speech recognition from AWS Transcribe.",
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/kibaffo33/aws_transcribe_to_docx",
     packages=setuptools.find_packages(),
-    install_requires=["python-docx", "matplotlib", "pandas", "webvtt-py"],
+    install_requires=["python-docx", "matplotlib", "pandas"],
+    extras_require={"parquet": ["pyarrow"]},
+    entry_points={"console_scripts": ["tscribe=tscribe.cli:main"]},
     classifiers=[
         "License :: OSI Approved :: MIT License",
         "Programming Language :: Python :: 3",
@@ -24,9 +24,10 @@ def test_multiple_speakers():
     tscribe.write(input_file)
     assert os.access(output_file, os.F_OK), "Output file not found"
 
+    assert not os.access("sample_material/chart.png", os.F_OK), "Chart left on disk"
+
     # Teardown
     os.remove(output_file)
-    os.remove("sample_material/chart.png")
 
 
 def test_multiple_speakers_with_save_as():
@@ -48,9 +49,10 @@ def test_multiple_speakers_with_save_as():
     tscribe.write(input_file, save_as=output_file)
     assert os.access(output_file, os.F_OK), "Output file not found"
 
+    assert not os.access("sample_material/chart.png", os.F_OK), "Chart left on disk"
+
     # Teardown
     os.remove(output_file)
-    os.remove("sample_material/chart.png")
 
 
 # SKIPPED - chart now writes to same directory as output through use of the Path parent
@@ -103,9 +105,10 @@ def test_single_speaker():
     tscribe.write(input_file)
     assert os.access(output_file, os.F_OK), "Output file not found"
 
+    assert not os.access("sample_material/chart.png", os.F_OK), "Chart left on disk"
+
     # Teardown
     os.remove(output_file)
-    os.remove("sample_material/chart.png")
 
 
 def test_single_speaker_with_save_as():
@@ -127,9 +130,10 @@ def test_single_speaker_with_save_as():
     tscribe.write(input_file, save_as=output_file)
     assert os.access(output_file, os.F_OK), "Output file not found"
 
+    assert not os.access("sample_material/chart.png", os.F_OK), "Chart left on disk"
+
     # Teardown
     os.remove(output_file)
-    os.remove("sample_material/chart.png")
 
 
 # SKIPPED - chart now writes to same directory as output through use of the Path parent
@@ -1,5 +1,6 @@
 import pytest
 import tscribe
+import tscribe.cli
 import os
 import pandas
 from uuid import uuid4
@@ -8,7 +9,13 @@ import sqlite3
 from docx import Document
 import webvtt
 import glob
+import io
+import statistics
+import json
 import logging
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
 
 
 logging.basicConfig(filename="log.txt", level=logging.DEBUG, filemode="w")
@@ -25,6 +32,43 @@ def test_sample_files(sample):
     assert data["accountId"] == "XXXXXXXXXXXX"
 
 
+def test_import_time():
+    """
+    Test that importing tscribe stays cheap
+
+    GIVEN a fresh interpreter
+    WHEN importing tscribe
+    THEN no writer dependencies, nor other slow modules, are loaded
+
+    The import is timed against a budget by benchmarks/bench_import_time.py,
+    as wall-clock limits are unreliable on a loaded machine.
+    """
+
+    logging.info("test_import_time")
+
+    # GIVEN a fresh interpreter
+    # WHEN importing tscribe
+    process = subprocess.run(
+        [sys.executable, "-c", "import sys, tscribe; print(' '.join(sys.modules))"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # THEN no writer dependencies, nor other slow modules, are loaded
+    modules = process.stdout.split()
+    for heavy in [
+        "docx",
+        "matplotlib",
+        "pandas",
+        "webvtt",
+        "urllib.request",
+        "http.client",
+        "email",
+    ]:
+        assert heavy not in modules, f"{heavy} should be imported lazily"
+
+
 @pytest.mark.parametrize(
     "time_stamp,expected",
     [
@@ -64,6 +108,37 @@ def test_convert_time_stamp(time_stamp, expected):
     ), f"Reverse calculation of {time_stamp} shoud be {total_seconds}"
 
 
+@pytest.mark.parametrize(
+    "time_stamp,separator,expected",
+    [
+        (0.49, ".", "00:00:00.490"),
+        ("2.5", ".", "00:00:02.500"),
+        (61.0006, ",", "00:01:01,001"),
+        (3599.9996, ".", "01:00:00.000"),
+        (90061.25, ",", "25:01:01,250"),
+    ],
+)
+def test_format_cue_time(time_stamp, separator, expected):
+    """
+    Test caption timestamp formatting
+
+    GIVEN seconds as a float or str
+    WHEN calling format_cue_time(...)
+    THEN format as HH:MM:SS.mmm, rounded to the millisecond
+    """
+
+    logging.info("test_format_cue_time")
+
+    # GIVEN seconds as a float or str
+    # provided through parametrize
+
+    # WHEN calling format_cue_time(...)
+    result = tscribe.format_cue_time(time_stamp, separator)
+
+    # THEN format as HH:MM:SS.mmm, rounded to the millisecond
+    assert result == expected, f"Result of {time_stamp} should be {expected}"
+
+
 @pytest.mark.parametrize("input_file", sample_files)
 def test_load_json_as_dict(input_file):
     """
@@ -86,6 +161,225 @@ def test_load_json_as_dict(input_file):
     assert isinstance(data, dict), "Data should by of dict type"
 
 
+@pytest.mark.parametrize("backend", tscribe.JSON_BACKENDS)
+def test_load_json_backends(backend):
+    """
+    Test the json backends
+
+    GIVEN an installed json backend
+    WHEN loading each sample with it
+    THEN the result matches the standard library's
+    """
+
+    logging.info("test_load_json_backends")
+
+    # GIVEN an installed json backend
+    try:
+        tscribe.json_loads(backend)
+    except ImportError:
+        pytest.skip(f"{backend} is not installed")
+
+    for input_file in sample_files:
+        # WHEN loading each sample with it
+        data = tscribe.load_json_as_dict(input_file, backend=backend)
+
+        # THEN the result matches the standard library's
+        with open(input_file, encoding="utf-8") as file:
+            assert data == json.load(file)
+
+    with pytest.raises(Exception, match="json backend should be one of"):
+        tscribe.load_json_as_dict(sample_files[0], backend="yaml")
+
+
+@pytest.mark.parametrize("input_file", sample_files)
+def test_load_json_as_stream(input_file):
+    """
+    Test streaming json from disk
+
+    GIVEN a sample json file
+    WHEN calling tscribe.load_json_as_stream(...)
+    THEN decode to the same transcript as loading it whole
+    """
+
+    logging.info("test_load_json_as_stream")
+
+    # GIVEN a sample json file
+    # provided through parametrize
+
+    # WHEN calling tscribe.load_json_as_stream(...)
+    data = tscribe.load_json_as_stream(input_file)
+
+    # THEN decode to the same transcript as loading it whole
+    assert data["jobName"] == tscribe.load_json_as_dict(input_file)["jobName"]
+    assert tscribe.decode_transcript(data) == tscribe.decode_transcript(
+        tscribe.load_json_as_dict(input_file)
+    ), "Streamed and loaded transcripts should match"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 8, 64])
+def test_json_stream_reader(chunk_size):
+    """
+    Test incremental json reading across chunk boundaries
+
+    GIVEN json split into small chunks
+    WHEN walking a path and skipping everything else
+    THEN values are read whole, including numbers and strings holding brackets
+    """
+
+    logging.info("test_json_stream_reader")
+
+    # GIVEN json split into small chunks
+    text = (
+        '{"a": ["x]\\"{", {"b": [1, 2.5e3, "]}"]}],'
+        ' "c": {"d": [true, null, "\u00e9]", -12.75]}, "e": 12345}'
+    )
+    reader = tscribe.stream.JSONStreamReader(io.StringIO(text), chunk_size)
+
+    # WHEN walking a path and skipping everything else
+    values = list(tscribe.stream.walk(reader, ("c", "d", None)))
+
+    # THEN values are read whole, including numbers and strings holding brackets
+    assert values == [((0,), True), ((1,), None), ((2,), "\u00e9]"), ((3,), -12.75)]
+
+
+@pytest.mark.parametrize("input_file", sample_files)
+def test_decode_words(input_file):
+    """
+    Test single pass word decoding
+
+    GIVEN the items of a data dict as a generator
+    WHEN calling decode_words(...)
+    THEN return one word per pronunciation, in order
+    """
+
+    logging.info("test_decode_words")
+
+    # GIVEN the items of a data dict as a generator
+    data = tscribe.load_json_as_dict(input_file)
+    items = (item for item in data["results"]["items"])
+
+    # WHEN calling decode_words(...)
+    words = tscribe.decode_words(items)
+
+    # THEN return one word per pronunciation, in order
+    pronunciations = [
+        x for x in data["results"]["items"] if x["type"] == "pronunciation"
+    ]
+    assert len(words) == len(pronunciations), "Each pronunciation should be a word"
+    for word, item in zip(words, pronunciations):
+        assert (word["start_time"], word["end_time"]) == (
+            float(item["start_time"]),
+            float(item["end_time"]),
+        )
+
+
+def test_best_alternative():
+    """
+    Test the most confident alternative is chosen by number
+
+    GIVEN an item whose confidences sort differently as strings and numbers
+    WHEN calling decode_words(...)
+    THEN the word is the numerically most confident alternative
+    """
+
+    logging.info("test_best_alternative")
+
+    # GIVEN an item whose confidences sort differently as strings and numbers
+    alternatives = [
+        {"confidence": "0.5", "content": "whether"},
+        {"confidence": ".9", "content": "weather"},
+        {"confidence": "0.90", "content": "wether"},
+    ]
+    item = {
+        "start_time": "1.5",
+        "end_time": "2.0",
+        "alternatives": alternatives,
+        "type": "pronunciation",
+    }
+
+    # WHEN calling decode_words(...)
+    words = tscribe.decode_words([item])
+
+    # THEN the word is the numerically most confident alternative
+    assert words[0].content == "weather", "Ties should go to the earliest"
+    assert words[0].confidence == 0.9
+    assert tscribe.best_alternative(alternatives[:1])["content"] == "whether"
+
+
+@pytest.mark.parametrize("input_file", sample_files)
+def test_decode_records(input_file):
+    """
+    Test decoded words and segments are compact records
+
+    GIVEN a data dict
+    WHEN calling decode_transcript(...)
+    THEN segments and words are slotted records, readable as attributes or keys
+    """
+
+    logging.info("test_decode_records")
+
+    # GIVEN a data dict
+    data = tscribe.load_json_as_dict(input_file)
+
+    # WHEN calling decode_transcript(...)
+    transcript = tscribe.decode_transcript(data)
+
+    # THEN segments and words are slotted records, readable as attributes or keys
+    for segment in transcript["segments"]:
+        assert isinstance(segment, tscribe.Segment)
+        assert not hasattr(segment, "__dict__"), "Records should have no __dict__"
+        assert segment["speaker"] is segment.speaker
+        for word in segment.words:
+            assert isinstance(word, tscribe.Word)
+            assert isinstance(word.confidence, float)
+            assert word == dict(word), "Records should equal their dict form"
+            with pytest.raises(KeyError):
+                word["missing"]
+
+
+@pytest.mark.parametrize(
+    "input_file",
+    [x for x in sample_files if "channel-identification" in x],
+)
+def test_build_channel_index(input_file):
+    """
+    Test channel lookup table against a scan of each channel's items
+
+    GIVEN a data dict with channel_labels
+    WHEN calling build_channel_index(...) and decoding the transcript
+    THEN each word maps to the channel holding it, and rows follow channel changes
+    """
+
+    logging.info("test_build_channel_index")
+
+    # GIVEN a data dict with channel_labels
+    data = tscribe.load_json_as_dict(input_file)
+    channels = data["results"]["channel_labels"]["channels"]
+    pronunciations = [
+        x for x in data["results"]["items"] if x["type"] == "pronunciation"
+    ]
+
+    # WHEN calling build_channel_index(...) and decoding the transcript
+    channel_index = tscribe.build_channel_index(data)
+    df = tscribe.decode_transcript_to_dataframe(
+        tscribe.decode_transcript(data, channel_index=channel_index)
+    )
+
+    # THEN each word maps to the channel holding it, and rows follow channel changes
+    expected = []
+    for word in pronunciations:
+        channel = [x for x in channels if word in x["items"]][0]["channel_label"]
+        key = (float(word["start_time"]), float(word["end_time"]))
+        assert channel_index[key] == channel
+        if not expected or expected[-1] != channel:
+            expected.append(channel)
+    assert list(df["speaker"]) == expected, "Rows should follow channel changes"
+    contents = [x["alternatives"][0]["content"] for x in data["results"]["items"]]
+    assert "".join(df["comment"]).replace(" ", "") == "".join(contents).replace(
+        " ", ""
+    ), "Every word and punctuation mark should be written once, in order"
+
+
 @pytest.mark.parametrize("input_file", sample_files)
 def test_calculate_confidence_statistics(input_file):
     """
@@ -121,6 +415,43 @@ def test_calculate_confidence_statistics(input_file):
     assert "0" in stats, "Data model should include 0"
 
 
+@pytest.mark.parametrize("input_file", sample_files)
+def test_calculate_confidence_statistics_values(input_file):
+    """
+    Test vectorised confidence stats against counting word by word
+
+    GIVEN a decoded transcript
+    WHEN calling calculate_confidence_statistics(...)
+    THEN buckets, accuracy, mean and percentiles match a plain python count
+    """
+
+    logging.info("test_calculate_confidence_statistics_values")
+
+    # GIVEN a decoded transcript
+    transcript = tscribe.decode_transcript(tscribe.load_json_as_dict(input_file))
+    words = [word for segment in transcript["segments"] for word in segment["words"]]
+
+    # WHEN calling calculate_confidence_statistics(...)
+    stats = tscribe.calculate_confidence_statistics(transcript)
+
+    # THEN buckets, accuracy, mean and percentiles match a plain python count
+    expected = {str(x): 0 for x in range(10)}
+    expected["9.8"] = 0
+    for word in words:
+        if word["confidence"] >= 0.98:
+            expected["9.8"] += 1
+        else:
+            expected[str(int(word["confidence"] * 10))] += 1
+    for bucket, count in expected.items():
+        assert stats[bucket] == count, f"Bucket {bucket} should hold {count}"
+
+    accuracy = [int(word["confidence"] * 100) for word in words]
+    assert stats["accuracy"] == accuracy
+    assert stats["timestamps"] == [float(word["start_time"]) for word in words]
+    assert stats["mean"] == pytest.approx(sum(accuracy) / len(accuracy))
+    assert stats["percentiles"][50] == pytest.approx(statistics.median(accuracy))
+
+
 @pytest.mark.parametrize("input_file", sample_files)
 def test_make_graph_png(input_file):
     """
@@ -151,6 +482,202 @@ def test_make_graph_png(input_file):
     os.remove(filepath)
 
 
+def test_chart_cache(tmp_path, monkeypatch):
+    """
+    Test the on-disk cache of stats and charts
+
+    GIVEN a cache directory
+    WHEN writing the same transcript to docx twice
+    THEN the second run reuses the cached stats and chart without drawing
+    """
+
+    logging.info("test_chart_cache")
+
+    # GIVEN a cache directory
+    input_file = "sample_material/03-speaker-identification.json"
+    cache = tmp_path / "cache"
+
+    # WHEN writing the same transcript to docx twice
+    first = tscribe.write(input_file, save_as=tmp_path / "first.docx", cache=cache)
+    assert len(list(cache.glob("*.png"))) == 1, "Chart should be cached"
+    assert len(list(cache.glob("*.json"))) == 1, "Stats should be cached"
+
+    def make_graph(*args, **kwargs):
+        raise AssertionError("Chart should come from the cache")
+
+    monkeypatch.setattr(tscribe, "make_graph", make_graph)
+    second = tscribe.write(input_file, save_as=tmp_path / "second.docx", cache=cache)
+
+    # THEN the second run reuses the cached stats and chart without drawing
+    first, second = Document(first), Document(second)
+    assert [x.text for x in first.tables[0]._cells] == [
+        x.text for x in second.tables[0]._cells
+    ]
+    stats = tscribe.calculate_confidence_statistics(
+        tscribe.load_json_as_dict(input_file)
+    )
+    key = tscribe.ChartCache(cache).key(
+        tscribe.file_digest(input_file), max_points=5000
+    )
+    assert tscribe.ChartCache(cache).get(key)[0] == stats
+
+    # Formats other than docx never consult the cache, so need no hash
+    def file_digest(*args, **kwargs):
+        raise AssertionError("Source should not be hashed without docx")
+
+    monkeypatch.setattr(tscribe, "file_digest", file_digest)
+    tscribe.write(
+        input_file, format=["csv", "vtt"], save_as=tmp_path / "o.csv", cache=cache
+    )
+
+
+def test_chart_cache_eviction(tmp_path):
+    """
+    Test least recently used eviction from the chart cache
+
+    GIVEN a cache with room for two entries
+    WHEN a third entry is stored after reading the first
+    THEN the entry unused for longest is evicted
+    """
+
+    logging.info("test_chart_cache_eviction")
+
+    # GIVEN a cache with room for two entries
+    stats = {"mean": 1.0, "percentiles": {5: 1.0}}
+    chart = bytes(1000)
+    size = len(chart) + len(json.dumps(stats))
+    cache = tscribe.ChartCache(tmp_path, max_bytes=size * 2)
+
+    # WHEN a third entry is stored after reading the first
+    cache.put("a", stats, chart)
+    cache.put("b", stats, chart)
+    os.utime(tmp_path / "a.png", (0, 0))
+    os.utime(tmp_path / "a.json", (0, 0))
+    os.utime(tmp_path / "b.png", (1, 1))
+    os.utime(tmp_path / "b.json", (1, 1))
+    assert cache.get("a") == (stats, chart)
+    cache.put("c", stats, chart)
+
+    # THEN the entry unused for longest is evicted
+    assert cache.get("b") is None, "Least recently used entry should be evicted"
+    assert cache.get("a") == (stats, chart)
+    assert cache.get("c") == (stats, chart)
+
+
+@pytest.mark.parametrize("input_file", sample_files)
+def test_decode_transcript(input_file):
+    """
+    Test decoding into the shared transcript model
+
+    GIVEN a data dict
+    WHEN calling decode_transcript(...)
+    THEN return segments of words covering every pronunciation once
+    """
+
+    logging.info("test_decode_transcript")
+
+    # GIVEN a data dict
+    data = tscribe.load_json_as_dict(input_file)
+
+    # WHEN calling decode_transcript(...)
+    transcript = tscribe.decode_transcript(data)
+
+    # THEN return segments of words covering every pronunciation once
+    assert transcript["job_name"] == data["jobName"]
+    words = [word for segment in transcript["segments"] for word in segment["words"]]
+    pronunciations = [
+        x for x in data["results"]["items"] if x["type"] == "pronunciation"
+    ]
+    assert len(words) == len(pronunciations), "Each pronunciation should be a word"
+    for segment in transcript["segments"]:
+        assert segment["words"], "Segments should not be empty"
+        for word in segment["words"]:
+            assert isinstance(word["confidence"], float)
+            assert word["punctuation"] in ("", ".", ",", "?", "!")
+
+
+def test_make_graph_png_threads(tmp_path):
+    """
+    Test drawing charts from several threads at once
+
+    GIVEN confidence stats and a directory per thread
+    WHEN calling make_graph_png(...) concurrently
+    THEN each thread produces its chart
+    """
+
+    logging.info("test_make_graph_png_threads")
+
+    # GIVEN confidence stats and a directory per thread
+    stats = [
+        tscribe.calculate_confidence_statistics(tscribe.load_json_as_dict(x))
+        for x in sample_files[:8]
+    ]
+    directories = [tmp_path / str(x) for x in range(len(stats))]
+    for directory in directories:
+        directory.mkdir()
+
+    # WHEN calling make_graph_png(...) concurrently
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        charts = list(executor.map(tscribe.make_graph_png, stats, directories))
+
+    # THEN each thread produces its chart
+    for chart, directory in zip(charts, directories):
+        assert Path(chart) == directory / "chart.png"
+        assert Path(chart).stat().st_size > 0, "chart.png should not be empty"
+
+
+def test_bin_scatter():
+    """
+    Test reducing a large scatter to points per time window
+
+    GIVEN a scatter of many words
+    WHEN calling bin_scatter(...)
+    THEN each accuracy appears once per window it occurs in
+    """
+
+    logging.info("test_bin_scatter")
+
+    # GIVEN a scatter of many words
+    timestamps = [x / 10 for x in range(100_000)]
+    accuracy = [100 if x % 1000 else 42 for x in range(100_000)]
+
+    # WHEN calling bin_scatter(...)
+    x, y = tscribe.bin_scatter(timestamps, accuracy, 10)
+
+    # THEN each accuracy appears once per window it occurs in
+    assert len(x) == len(y) == 20, "Two accuracies in each of ten windows"
+    assert sorted(set(y.tolist())) == [42, 100]
+    assert min(x) > min(timestamps) and max(x) < max(timestamps)
+
+
+@pytest.mark.parametrize("max_points", [50, 500, 5000])
+def test_scatter_points(max_points):
+    """
+    Test the confidence scatter is held to max_points
+
+    GIVEN a scatter of many words, every accuracy occurring throughout
+    WHEN calling scatter_points(...)
+    THEN no more than max_points remain, or 101 below that
+    """
+
+    logging.info("test_scatter_points")
+
+    # GIVEN a scatter of many words, every accuracy occurring throughout
+    timestamps = [x / 10 for x in range(180_000)]
+    accuracy = [x * 7 % 101 for x in range(180_000)]
+
+    # WHEN calling scatter_points(...)
+    x, y = tscribe.scatter_points(timestamps, accuracy, max_points)
+
+    # THEN no more than max_points remain, or 101 below that
+    assert len(x) == len(y) <= max(max_points, 101)
+    assert sorted(set(y.tolist())) == list(range(101))
+    assert tscribe.scatter_points(timestamps[:10], accuracy[:10]) == (
+        timestamps[:10],
+        accuracy[:10],
+    ), "Small scatters are plotted whole"
+
+
 @pytest.mark.parametrize("input_file", sample_files)
 def test_decode_transcript_to_dataframe(input_file):
     """
@@ -239,8 +766,104 @@ def test_write_to_docx(input_file):
     ), "Second table should be length of dataframe + headers"
 
     assert (
-        "chart.png" in document.paragraphs[6]._p.xml
+        "<pic:pic" in document.paragraphs[6]._p.xml
     ), "Chart should be in paragraph six"
+    assert not (
+        output_filename.parent / "chart.png"
+    ).is_file(), "Chart should not be left on disk"
+
+    # Teardown
+    os.remove(output_filename)
+
+
+@pytest.mark.parametrize("input_file", sample_files)
+def test_write_to_docx_backends(input_file):
+    """
+    Test bulk xml docx rows against python-docx runs
+
+    GIVEN an input file
+    WHEN writing to docx with and without fast_docx
+    THEN each transcript cell has the same text, in the same colours
+    """
+
+    logging.info("test_write_to_docx_backends")
+
+    def cell_colours(cell):
+        """Characters of a cell paired with their colour"""
+        return [
+            (character, str(run.font.color.rgb))
+            for paragraph in cell.paragraphs
+            for run in paragraph.runs
+            for character in run.text
+        ]
+
+    # GIVEN an input file
+    # WHEN writing to docx with and without fast_docx
+    fast_filename = Path(f"{uuid4().hex}.docx")
+    slow_filename = Path(f"{uuid4().hex}.docx")
+    tscribe.write(input_file, save_as=fast_filename, fast_docx=True)
+    tscribe.write(input_file, save_as=slow_filename, fast_docx=False)
+
+    # THEN each transcript cell has the same text, in the same colours
+    fast = Document(fast_filename).tables[1]
+    slow = Document(slow_filename).tables[1]
+    assert len(fast.rows) == len(slow.rows), "Tables should have the same rows"
+    for fast_row, slow_row in zip(fast.rows, slow.rows):
+        for fast_cell, slow_cell in zip(fast_row.cells, slow_row.cells):
+            assert fast_cell.text == slow_cell.text
+            assert fast_cell.width == slow_cell.width
+            assert cell_colours(fast_cell) == cell_colours(slow_cell)
+
+    # Teardown
+    os.remove(fast_filename)
+    os.remove(slow_filename)
+
+
+@pytest.mark.parametrize("fast_docx", [True, False])
+@pytest.mark.parametrize(
+    "grey_threshold,percent",
+    [(0.0, "0"), (0.29, "29"), (0.5, "50"), (0.57, "57"), (0.98, "98"), (1.01, "101")],
+)
+def test_write_to_docx_grey_threshold(grey_threshold, percent, fast_docx):
+    """
+    Test the confidence threshold for grey text
+
+    GIVEN an input file and a grey_threshold
+    WHEN writing to docx
+    THEN grey runs are exactly the words below the threshold, one run per colour
+    """
+
+    logging.info("test_write_to_docx_grey_threshold")
+
+    # GIVEN an input file and a grey_threshold
+    input_file = "sample_material/03-speaker-identification.json"
+    transcript = tscribe.decode_transcript(tscribe.load_json_as_dict(input_file))
+
+    # WHEN writing to docx
+    output_filename = Path(f"{uuid4().hex}.docx")
+    tscribe.write(
+        input_file,
+        save_as=output_filename,
+        grey_threshold=grey_threshold,
+        fast_docx=fast_docx,
+    )
+
+    # THEN grey runs are exactly the words below the threshold, one run per colour
+    document = Document(output_filename)
+    assert f"less than {percent}% confidence" in document.paragraphs[4].text
+
+    rows = document.tables[1].rows[1:]
+    for row, segment in zip(rows, transcript["segments"]):
+        runs = row.cells[2].paragraphs[0].runs
+        grey = [run.text for run in runs if run.font.color.rgb is not None]
+        expected = tscribe.coalesce_runs(segment["words"], grey_threshold)
+        assert [run.text for run in runs] == [text for _, text in expected]
+        assert grey == [text for is_grey, text in expected if is_grey]
+        assert " ".join(grey).split() == [
+            word["content"]
+            for word in segment["words"]
+            if word["confidence"] < grey_threshold
+        ]
 
     # Teardown
     os.remove(output_filename)
@@ -312,6 +935,109 @@ def test_write_to_sqlite(input_file):
     os.remove(output_filename)
 
 
+@pytest.mark.skipif(os.name != "posix", reason="file modes are posix")
+def test_write_to_sqlite_mode(tmp_path):
+    """
+    Test sqlite outputs get the same file mode as other outputs
+
+    GIVEN a umask of 022
+    WHEN writing to sqlite and csv
+    THEN both are readable by others, and no temporary file is left behind
+    """
+
+    logging.info("test_write_to_sqlite_mode")
+
+    # GIVEN a umask of 022
+    umask = os.umask(0o022)
+
+    # WHEN writing to sqlite and csv
+    try:
+        tscribe.write(
+            sample_files[0], format=["sqlite", "csv"], save_as=tmp_path / "a.db"
+        )
+    finally:
+        os.umask(umask)
+
+    # THEN both are readable by others, and no temporary file is left behind
+    for output in ("a.db", "a.csv"):
+        assert (tmp_path / output).stat().st_mode & 0o777 == 0o644
+    assert sorted(x.name for x in tmp_path.iterdir()) == ["a.csv", "a.db"]
+
+
+@pytest.mark.parametrize(
+    "text,width",
+    [
+        ("short line", 80),
+        ("word " * 50, 80),
+        ("a" * 100 + " tail", 80),
+        ("one two three four five", 9),
+    ],
+)
+def test_wrap_caption(text, width):
+    """
+    Test splitting caption text into lines
+
+    GIVEN caption text
+    WHEN calling wrap_caption(...)
+    THEN no line reaches past width and no text is lost
+    """
+
+    logging.info("test_wrap_caption")
+
+    # GIVEN caption text
+    # provided through parametrize
+
+    # WHEN calling wrap_caption(...)
+    lines = tscribe.wrap_caption(text.strip(), width)
+
+    # THEN no line reaches past width and no text is lost
+    assert all(len(x) <= width for x in lines)
+    assert "".join(lines).replace(" ", "") == text.replace(" ", "")
+
+
+@pytest.mark.parametrize("input_file", sample_files)
+def test_write_to_srt(input_file):
+    """
+    Test production of srt format
+
+    GIVEN an input file
+    WHEN writing to srt, and to an open file
+    THEN number each segment's cue, with millisecond times and all of its text
+    """
+
+    logging.info("test_write_to_srt")
+
+    # GIVEN an input file
+    transcript = tscribe.decode_transcript(tscribe.load_json_as_dict(input_file))
+
+    # WHEN writing to srt, and to an open file
+    output_filename = Path(f"{uuid4().hex}.srt")
+    tscribe.write(input_file, save_as=output_filename, format="srt")
+    buffer = io.StringIO()
+    tscribe.write_srt(transcript, buffer)
+
+    # THEN number each segment's cue, with millisecond times and all of its text
+    text = output_filename.read_text(encoding="utf-8")
+    assert text == buffer.getvalue()
+
+    cues = text.split("\n\n")
+    assert len(cues) == len(transcript["segments"])
+    for number, (cue, segment) in enumerate(zip(cues, transcript["segments"]), 1):
+        lines = cue.strip("\n").split("\n")
+        assert lines[0] == str(number)
+        assert lines[1] == (
+            tscribe.format_cue_time(segment["start_time"], ",")
+            + " --> "
+            + tscribe.format_cue_time(segment["end_time"], ",")
+        )
+        assert " ".join(lines[2:]).split() == " ".join(
+            x["content"] + x["punctuation"] for x in segment["words"]
+        ).split()
+
+    # Teardown
+    os.remove(output_filename)
+
+
 @pytest.mark.parametrize("input_file", sample_files)
 def test_write_to_vtt(input_file):
     """
@@ -338,6 +1064,15 @@ def test_write_to_vtt(input_file):
         df
     ), "vtt file should have equal captions to df rows"
 
+    # Cues keep the milliseconds of each segment
+    segments = tscribe.decode_transcript(data)["segments"]
+    for caption, segment in zip(vtt.captions, segments):
+        assert caption.start == tscribe.format_cue_time(segment["start_time"])
+        assert caption.end == tscribe.format_cue_time(segment["end_time"])
+        assert caption.text.split() == " ".join(
+            x["content"] + x["punctuation"] for x in segment["words"]
+        ).split(), "no text should be lost when split into lines"
+
     for caption in vtt.captions:
 
         assert hasattr(caption, "start"), "each caption should have a start_time"
@@ -355,6 +1090,45 @@ def test_write_to_vtt(input_file):
     os.remove(output_filename)
 
 
+@pytest.mark.parametrize("input_file", sample_files)
+def test_write_to_multiple_formats(input_file):
+    """
+    Test production of several formats from a single call
+
+    GIVEN an input file
+    WHEN writing to a list of formats
+    THEN check each output exists, named after save_as
+    """
+
+    logging.info("test_write_to_multiple_formats")
+
+    # GIVEN an input file
+    # WHEN writing to a list of formats
+    output_name = Path(uuid4().hex)
+    outputs = tscribe.write(
+        input_file, save_as=output_name, format=["docx", "vtt", "sqlite"]
+    )
+
+    # THEN check each output exists, named after save_as
+    assert outputs == [
+        output_name.with_suffix(".docx"),
+        output_name.with_suffix(".vtt"),
+        output_name.with_suffix(".db"),
+    ]
+    for output_filename in outputs:
+        assert output_filename.is_file(), "Output file should exist"
+
+    vtt = webvtt.read(output_name.with_suffix(".vtt"))
+    conn = sqlite3.connect(str(output_name.with_suffix(".db")))
+    rows = conn.execute("SELECT COUNT(*) FROM transcript").fetchone()[0]
+    conn.close()
+    assert len(vtt.captions) == rows, "Formats should share the decoded transcript"
+
+    # Teardown
+    for output_filename in outputs:
+        os.remove(output_filename)
+
+
 @pytest.mark.parametrize("input_file", sample_files)
 def test_write_to_default(input_file):
     """
@@ -380,6 +1154,748 @@ def test_write_to_default(input_file):
     os.remove(output_filename)
 
 
+@pytest.mark.parametrize("source", ["bytes", "dict", "binary file", "text file"])
+def test_write_in_memory(tmp_path, source):
+    """
+    Test writing from json held in memory
+
+    GIVEN a transcript as bytes, a dict or a file object
+    WHEN writing without save_as, and to a binary file
+    THEN outputs are returned as bytes matching those written from disk
+    """
+
+    logging.info("test_write_in_memory")
+
+    # GIVEN a transcript as bytes, a dict or a file object
+    input_file = "sample_material/03-speaker-identification.json"
+    raw = Path(input_file).read_bytes()
+    sources = {
+        "bytes": lambda: raw,
+        "dict": lambda: json.loads(raw),
+        "binary file": lambda: io.BytesIO(raw),
+        "text file": lambda: io.StringIO(raw.decode("utf-8")),
+    }
+    output_formats = ["csv", "vtt", "srt", "sqlite", "docx"]
+
+    # WHEN writing without save_as, and to a binary file
+    outputs = tscribe.write(sources[source](), format=output_formats)
+    stream = io.BytesIO()
+    returned = tscribe.write(sources[source](), format="vtt", save_as=stream)
+
+    # THEN outputs are returned as bytes matching those written from disk
+    expected = tscribe.write(
+        input_file, format=output_formats, save_as=tmp_path / "transcript"
+    )
+    for output, path in zip(outputs, expected):
+        assert isinstance(output, bytes)
+        if path.suffix in (".csv", ".vtt", ".srt"):
+            assert output == path.read_bytes(), f"{path.suffix} should match"
+
+    copy = tmp_path / "copy.db"
+    copy.write_bytes(outputs[3])
+    rows = []
+    for database in (copy, expected[3]):
+        conn = sqlite3.connect(database)
+        rows.append(conn.execute("SELECT * FROM transcript").fetchall())
+        conn.close()
+    assert rows[0] == rows[1], "sqlite should match"
+
+    document = Document(io.BytesIO(outputs[-1]))
+    assert document.tables[1].rows[1].cells[1].text == "spk_0"
+
+    assert returned is stream
+    assert stream.getvalue() == outputs[1]
+
+    # Decoders accept the same sources
+    assert tscribe.decode_transcript(sources[source]()) == tscribe.decode_transcript(
+        tscribe.load_json_as_dict(input_file)
+    )
+
+    with pytest.raises(Exception, match="save_as should be a path"):
+        tscribe.write(raw, format=["csv", "vtt"], save_as=io.BytesIO())
+
+
+def test_write_incremental(tmp_path, monkeypatch):
+    """
+    Test incremental reconversion
+
+    GIVEN outputs written incrementally
+    WHEN writing again, after changing options, the source or an output
+    THEN only stale outputs are rebuilt
+    """
+
+    logging.info("test_write_incremental")
+
+    # GIVEN outputs written incrementally
+    input_file = tmp_path / "transcript.json"
+    input_file.write_bytes(Path(sample_files[0]).read_bytes())
+    formats = ["docx", "csv", "sqlite"]
+    tscribe.write(input_file, format=formats, incremental=True)
+    docx, csv = input_file.with_suffix(".docx"), input_file.with_suffix(".csv")
+    db = input_file.with_suffix(".db")
+    assert tscribe.manifest_path(docx).is_file(), "Manifest should be written"
+
+    written = []
+    original = tscribe.decode_transcript
+
+    def decode_transcript(*args, **kwargs):
+        written.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(tscribe, "decode_transcript", decode_transcript)
+
+    def rebuilt(**kwargs):
+        before = {x: x.stat().st_mtime_ns for x in (docx, csv, db)}
+        written.clear()
+        tscribe.write(input_file, format=formats, incremental=True, **kwargs)
+        return {x.suffix for x in before if x.stat().st_mtime_ns != before[x]}
+
+    # WHEN writing again, after changing options, the source or an output
+    # THEN only stale outputs are rebuilt
+    assert rebuilt() == set(), "Nothing changed"
+    assert not written, "Source should not even be decoded"
+
+    assert rebuilt(grey_threshold=0.5) == {".docx"}, "docx options changed"
+    assert rebuilt(grey_threshold=0.5) == set()
+
+    os.utime(input_file, ns=(0, 0))
+    assert rebuilt(grey_threshold=0.5) == set(), "Touched, content unchanged"
+
+    csv.write_text("edited")
+    assert rebuilt(grey_threshold=0.5) == {".csv"}, "Output edited"
+
+    data = json.loads(input_file.read_text())
+    data["jobName"] = "renamed"
+    input_file.write_text(json.dumps(data))
+    assert rebuilt(grey_threshold=0.5) == {".docx", ".csv", ".db"}, "Source changed"
+    conn = sqlite3.connect(db)
+    rows = conn.execute("SELECT COUNT(*) FROM transcript").fetchone()[0]
+    conn.close()
+    assert rows == len(pandas.read_csv(csv)), "sqlite should be rebuilt, not added to"
+
+    assert rebuilt(grey_threshold=0.5, fts=True) == {".db"}, "sqlite options changed"
+
+    monkeypatch.setattr(tscribe, "__version__", "0.0.0")
+    assert rebuilt(grey_threshold=0.5) == {".docx", ".csv", ".db"}, "Version changed"
+
+
+def test_workers_capped(monkeypatch):
+    """
+    Test no more worker processes are started than there are files
+
+    GIVEN a batch of two files and eight workers asked for
+    WHEN calling tscribe.write_many(...) and tscribe.write_corpus(...)
+    THEN each starts a pool of two workers
+    """
+
+    logging.info("test_workers_capped")
+
+    import concurrent.futures
+
+    # GIVEN a batch of two files and eight workers asked for
+    pools = []
+
+    def executor(max_workers=None, **kwargs):
+        pools.append(max_workers)
+        return ThreadPoolExecutor(max_workers=max_workers)
+
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", executor)
+    missing = ["missing-1.json", "missing-2.json"]
+
+    # WHEN calling tscribe.write_many(...) and tscribe.write_corpus(...)
+    tscribe.write_many(missing, workers=8)
+    tscribe.write_corpus(missing, ":memory:", workers=8)
+
+    # THEN each starts a pool of two workers
+    assert pools == [2, 2]
+
+
+def test_warm_up():
+    """
+    Test warming up imports what the docx writer uses
+
+    GIVEN a fresh interpreter
+    WHEN calling warm_up(...) for docx
+    THEN the figure and agg canvas are imported, but not pyplot
+    """
+
+    logging.info("test_warm_up")
+
+    # GIVEN a fresh interpreter
+    # WHEN calling warm_up(...) for docx
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, tscribe; tscribe.warm_up('docx');"
+            " print(' '.join(sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # THEN the figure and agg canvas are imported, but not pyplot
+    modules = process.stdout.split()
+    assert "matplotlib.figure" in modules
+    assert "matplotlib.backends.backend_agg" in modules
+    assert "matplotlib.pyplot" not in modules, "Charts no longer use pyplot"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_write_many(workers):
+    """
+    Test writing many files in parallel
+
+    GIVEN the sample files and one missing file
+    WHEN calling tscribe.write_many(...)
+    THEN write every sample and report the missing file as a failure
+    """
+
+    logging.info("test_write_many")
+
+    # GIVEN the sample files and one missing file
+    missing = f"{uuid4().hex}.json"
+
+    # WHEN calling tscribe.write_many(...)
+    summary = tscribe.write_many(
+        sample_files + [missing], workers=workers, format="csv"
+    )
+
+    # THEN write every sample and report the missing file as a failure
+    assert [x["source"] for x in summary["succeeded"]] == sample_files
+    assert [x["source"] for x in summary["failed"]] == [missing]
+    assert "AssertionError" in summary["failed"][0]["error"]
+    for result in summary["succeeded"]:
+        assert Path(result["output"]).is_file(), "Output file should exist"
+        assert result["duration"] >= 0
+
+    # Teardown
+    for result in summary["succeeded"]:
+        os.remove(result["output"])
+
+
+@pytest.mark.parametrize("input_file", sample_files)
+def test_write_to_sqlite_fts(tmp_path, input_file):
+    """
+    Test full-text indexes of sqlite output
+
+    GIVEN a sample json file
+    WHEN writing to sqlite with fts and fts_words
+    THEN every segment and word is found through its index
+    """
+
+    logging.info("test_write_to_sqlite_fts")
+
+    # GIVEN a sample json file
+    transcript = tscribe.decode_transcript(tscribe.load_json_as_dict(input_file))
+
+    # WHEN writing to sqlite with fts and fts_words
+    output_filename = tmp_path / "transcript.db"
+    tscribe.write(
+        input_file, format="sqlite", save_as=output_filename, fts=True, fts_words=True
+    )
+
+    # THEN every segment and word is found through its index
+    conn = sqlite3.connect(output_filename)
+    conn.execute(
+        "INSERT INTO transcript_fts (transcript_fts) VALUES ('integrity-check')"
+    )
+    for segment in transcript["segments"]:
+        for word in segment["words"][:3]:
+            # Masked words such as *** hold nothing to index
+            if not any(x.isalnum() for x in word["content"]):
+                continue
+            phrase = '"' + word["content"].replace('"', '""') + '"'
+            segments = conn.execute(
+                "SELECT transcript.speaker FROM transcript_fts JOIN transcript"
+                " ON transcript.rowid = transcript_fts.rowid"
+                " WHERE transcript_fts MATCH ?",
+                (phrase,),
+            ).fetchall()
+            assert (segment["speaker"],) in segments
+            words = conn.execute(
+                "SELECT start_time, speaker FROM words_fts WHERE words_fts MATCH ?",
+                (phrase,),
+            ).fetchall()
+            assert (float(word["start_time"]), segment["speaker"]) in words
+    conn.close()
+
+
+@pytest.mark.parametrize("input_file", sample_files)
+@pytest.mark.parametrize("output_format", ["parquet", "arrow"])
+@pytest.mark.parametrize("stream", [False, True])
+def test_write_words(tmp_path, input_file, output_format, stream):
+    """
+    Test word-level parquet and arrow output
+
+    GIVEN a sample json file
+    WHEN writing to parquet or arrow
+    THEN a typed row is written for every alternative of every item
+    """
+
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    logging.info("test_write_words")
+
+    # GIVEN a sample json file
+    data = tscribe.load_json_as_dict(input_file)
+    items = data["results"]["items"]
+
+    # WHEN writing to parquet or arrow
+    output_filename = tmp_path / f"words.{output_format}"
+    tscribe.write(
+        input_file, format=output_format, save_as=output_filename, stream=stream
+    )
+
+    # THEN a typed row is written for every alternative of every item
+    if output_format == "parquet":
+        table = pyarrow.parquet.read_table(output_filename)
+    else:
+        table = pyarrow.ipc.open_file(output_filename).read_all()
+
+    assert table.column_names == tscribe.WORD_COLUMNS
+    assert table.schema.field("start_time").type == pyarrow.float64()
+    assert table.schema.field("confidence").type == pyarrow.float64()
+    assert table.num_rows == sum(len(x["alternatives"]) for x in items)
+
+    rows = [x for x in table.to_pylist() if x["alternative"] == 0]
+    assert [x["type"] for x in rows] == [x["type"] for x in items]
+
+    # Pronunciations carry their timings, speaker and channel
+    words = [
+        word
+        for segment in tscribe.decode_transcript(data)["segments"]
+        for word in segment["words"]
+    ]
+    pronunciations = [x for x in rows if x["type"] == "pronunciation"]
+    assert [x["start_time"] for x in pronunciations] == [
+        float(x["start_time"]) for x in words
+    ]
+    assert all(x["start_time"] is None for x in rows if x["type"] == "punctuation")
+    if "speaker_labels" in data["results"]:
+        assert all(x["speaker"] for x in pronunciations)
+    if "channel_labels" in data["results"]:
+        assert all(x["channel"] for x in pronunciations)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_write_words_without_decoding(tmp_path, monkeypatch, stream):
+    """
+    Test word-level formats read the json without decoding it
+
+    GIVEN a sample json file
+    WHEN writing parquet and arrow, then parquet with vtt
+    THEN the transcript is only decoded, and streamed again, when vtt needs it
+    """
+
+    pytest.importorskip("pyarrow")
+
+    logging.info("test_write_words_without_decoding")
+
+    # GIVEN a sample json file
+    input_file = sample_files[9]
+    calls = []
+    for name in ("decode_transcript", "load_json_as_stream"):
+        original = getattr(tscribe, name)
+
+        def counted(*args, name=name, original=original, **kwargs):
+            calls.append(name)
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(tscribe, name, counted)
+
+    # WHEN writing parquet and arrow, then parquet with vtt
+    # THEN the transcript is only decoded, and streamed again, when vtt needs it
+    save_as = tmp_path / "words"
+    kwargs = {"save_as": save_as, "stream": stream}
+    tscribe.write(input_file, format=["parquet", "arrow"], **kwargs)
+    streams = ["load_json_as_stream"] * 2 if stream else []
+    assert calls == streams, "parquet and arrow should not decode"
+
+    calls.clear()
+    tscribe.write(input_file, format=["vtt", "parquet"], **kwargs)
+    streams = ["load_json_as_stream"] if stream else []
+    assert calls == streams + ["decode_transcript"] + streams
+
+    items = tscribe.load_json_as_dict(input_file)["results"]["items"]
+    rows = sum(len(x["alternatives"]) for x in items)
+    for suffix in (".parquet", ".arrow"):
+        data = io.BytesIO(save_as.with_suffix(suffix).read_bytes())
+        if suffix == ".parquet":
+            import pyarrow.parquet
+
+            assert pyarrow.parquet.read_table(data).num_rows == rows
+        else:
+            import pyarrow.ipc
+
+            assert pyarrow.ipc.open_file(data).read_all().num_rows == rows
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_write_corpus(tmp_path, workers):
+    """
+    Test ingesting many files into a corpus database
+
+    GIVEN the sample files and one missing file
+    WHEN calling tscribe.write_corpus(...) twice
+    THEN every sample is ingested once, word by word, and the missing file fails
+    """
+
+    logging.info("test_write_corpus")
+
+    # GIVEN the sample files and one missing file
+    missing = f"{uuid4().hex}.json"
+    database = tmp_path / "corpus.db"
+
+    # WHEN calling tscribe.write_corpus(...) twice
+    tscribe.write_corpus(sample_files, database, workers=workers, batch_size=2)
+    summary = tscribe.write_corpus(sample_files + [missing], database, workers=workers)
+
+    # THEN every sample is ingested once, word by word, and the missing file fails
+    assert [x["source"] for x in summary["succeeded"]] == sample_files
+    assert [x["source"] for x in summary["failed"]] == [missing]
+    assert "AssertionError" in summary["failed"][0]["error"]
+
+    conn = sqlite3.connect(database)
+    assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    assert conn.execute("SELECT COUNT(*) FROM jobs").fetchone() == (len(sample_files),)
+
+    indexes = {x[0] for x in conn.execute("SELECT name FROM sqlite_master")}
+    assert {"words_job", "words_speaker", "words_time", "segments_speaker"} <= indexes
+    assert "segments_fts" not in indexes, "Full-text index only when asked for"
+
+    for input_file in sample_files:
+        transcript = tscribe.decode_transcript(tscribe.load_json_as_dict(input_file))
+        job_id, job_name = conn.execute(
+            "SELECT id, job_name FROM jobs WHERE source = ?",
+            (str(Path(input_file).resolve()),),
+        ).fetchone()
+        assert job_name == transcript["job_name"]
+
+        segments = conn.execute(
+            "SELECT speaker, comment FROM segments WHERE job_id = ? ORDER BY segment",
+            (job_id,),
+        ).fetchall()
+        dataframe = tscribe.decode_transcript_to_dataframe(transcript)
+        assert segments == list(zip(dataframe["speaker"], dataframe["comment"]))
+
+        words = conn.execute(
+            "SELECT start_time, content, confidence FROM words WHERE job_id = ?"
+            " ORDER BY rowid",
+            (job_id,),
+        ).fetchall()
+        assert words == [
+            (float(x["start_time"]), x["content"], x["confidence"])
+            for segment in transcript["segments"]
+            for x in segment["words"]
+        ]
+
+    conn.close()
+
+
+def test_write_corpus_fts(tmp_path):
+    """
+    Test full-text indexes of a corpus database
+
+    GIVEN a corpus ingested without full-text indexes
+    WHEN ingesting more files, then some again, with fts and fts_words
+    THEN the indexes cover every row once and find words with their timestamps
+    """
+
+    logging.info("test_write_corpus_fts")
+
+    # GIVEN a corpus ingested without full-text indexes
+    database = tmp_path / "corpus.db"
+    tscribe.write_corpus(sample_files[:5], database, workers=1)
+
+    # WHEN ingesting more files, then some again, with fts and fts_words
+    for files in (sample_files, sample_files[:3]):
+        tscribe.write_corpus(files, database, workers=1, fts=True, fts_words=True)
+
+    # THEN the indexes cover every row once and find words with their timestamps
+    conn = sqlite3.connect(database)
+    for index in ("segments_fts", "words_fts"):
+        conn.execute(f"INSERT INTO {index} ({index}) VALUES ('integrity-check')")
+
+    words = conn.execute(
+        "SELECT words.job_id, words.start_time FROM words_fts"
+        " JOIN words ON words.rowid = words_fts.rowid WHERE words_fts MATCH 'gone'"
+    ).fetchall()
+    expected = conn.execute(
+        "SELECT job_id, start_time FROM words WHERE lower(content) = 'gone'"
+    ).fetchall()
+    assert words and sorted(words) == sorted(expected)
+
+    segments = conn.execute(
+        "SELECT COUNT(*) FROM segments_fts WHERE segments_fts MATCH 'gone'"
+    ).fetchone()
+    assert segments == conn.execute(
+        "SELECT COUNT(*) FROM segments WHERE comment LIKE '%gone%'"
+    ).fetchone()
+    conn.close()
+
+
+def test_write_corpus_fts_reingest(tmp_path):
+    """
+    Test full-text indexes stay in step when later runs do not ask for them
+
+    GIVEN a corpus ingested with fts and fts_words
+    WHEN ingesting some files again without fts
+    THEN the indexes pass an integrity check and only find current rows
+    """
+
+    logging.info("test_write_corpus_fts_reingest")
+
+    # GIVEN a corpus ingested with fts and fts_words
+    database = tmp_path / "corpus.db"
+    tscribe.write_corpus(sample_files, database, workers=1, fts=True, fts_words=True)
+
+    # WHEN ingesting some files again without fts
+    tscribe.write_corpus(sample_files[:3], database, workers=1)
+
+    # THEN the indexes pass an integrity check and only find current rows
+    conn = sqlite3.connect(database)
+    for index, table in (("segments_fts", "segments"), ("words_fts", "words")):
+        conn.execute(
+            f"INSERT INTO {index} ({index}, rank) VALUES ('integrity-check', 1)"
+        )
+        missing = conn.execute(
+            f"SELECT COUNT(*) FROM {index} LEFT JOIN {table}"
+            f" ON {table}.rowid = {index}.rowid"
+            f" WHERE {index} MATCH 'gone' AND {table}.rowid IS NULL"
+        ).fetchone()
+        assert missing == (0,), f"{index} should not point at replaced rows"
+    conn.close()
+
+
+@pytest.mark.parametrize("executor", ["default", "process"])
+def test_write_async(tmp_path, executor, capsys):
+    """
+    Test asynchronous conversion
+
+    GIVEN an event loop and an executor
+    WHEN awaiting tscribe.write_async(...)
+    THEN the output is written quietly while the loop keeps running
+    """
+
+    logging.info("test_write_async")
+
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor
+
+    # GIVEN an event loop and an executor
+    output_filename = tmp_path / "transcript.docx"
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0.001)
+
+    async def main(pool):
+        task = asyncio.create_task(ticker())
+        # WHEN awaiting tscribe.write_async(...)
+        output = await tscribe.write_async(
+            sample_files[2], executor=pool, save_as=output_filename
+        )
+        task.cancel()
+        return output
+
+    if executor == "process":
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            output = asyncio.run(main(pool))
+    else:
+        output = asyncio.run(main(None))
+
+    # THEN the output is written quietly while the loop keeps running
+    assert output == output_filename
+    assert output_filename.is_file(), "Output file should exist"
+    assert capsys.readouterr().out == "", "Nothing should be printed"
+    assert len(ticks) > 1, "The event loop should not be blocked"
+
+
+def test_write_many_async(tmp_path, monkeypatch):
+    """
+    Test asynchronous conversion of many files
+
+    GIVEN the sample files, one missing file and a concurrency limit
+    WHEN awaiting tscribe.write_many_async(...), then cancelling a second run
+    THEN never exceed the limit, summarise every file and stop queued files
+    """
+
+    logging.info("test_write_many_async")
+
+    import asyncio
+    import threading
+    import time
+
+    # GIVEN the sample files, one missing file and a concurrency limit
+    sources = []
+    for sample in sample_files[:6]:
+        source = tmp_path / Path(sample).name
+        source.write_bytes(Path(sample).read_bytes())
+        sources.append(str(source))
+    missing = str(tmp_path / f"{uuid4().hex}.json")
+
+    running, peak = [0], [0]
+    lock = threading.Lock()
+    write_one = tscribe.write_one
+
+    def counted(*args):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        try:
+            return write_one(*args)
+        finally:
+            with lock:
+                running[0] -= 1
+
+    monkeypatch.setattr(tscribe, "write_one", counted)
+
+    # WHEN awaiting tscribe.write_many_async(...), then cancelling a second run
+    summary = asyncio.run(
+        tscribe.write_many_async(sources + [missing], concurrency=2, format="csv")
+    )
+    for source in sources:
+        os.remove(Path(source).with_suffix(".csv"))
+
+    async def cancelled():
+        task = asyncio.create_task(
+            tscribe.write_many_async(sources, concurrency=1, format="csv")
+        )
+        await asyncio.sleep(0.02)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancelled())
+
+    # THEN never exceed the limit, summarise every file and stop queued files
+    assert peak[0] == 2, "At most two conversions should run at once"
+    assert [x["source"] for x in summary["succeeded"]] == sources
+    assert [x["source"] for x in summary["failed"]] == [missing]
+    assert len(list(tmp_path.glob("*.csv"))) <= 1, "Queued files should not run"
+
+
+def test_cli(tmp_path):
+    """
+    Test the command line interface in batch mode
+
+    GIVEN a directory of sample files
+    WHEN running tscribe on the directory, then again skipping existing outputs
+    THEN write each format once and report what was written and skipped
+    """
+
+    logging.info("test_cli")
+
+    # GIVEN a directory of sample files
+    for sample in sample_files[:3]:
+        (tmp_path / Path(sample).name).write_bytes(Path(sample).read_bytes())
+    report = tmp_path / "report.txt"
+
+    # WHEN running tscribe on the directory, then again skipping existing outputs
+    first = tscribe.cli.main(
+        [
+            str(tmp_path),
+            "--format",
+            "csv,vtt",
+            "--jobs",
+            "2",
+            "--report",
+            str(report),
+        ]
+    )
+    second = tscribe.cli.main(
+        [str(tmp_path / "*.json"), "-f", "csv", "-f", "vtt", "--skip-existing"]
+    )
+
+    # THEN write each format once and report what was written and skipped
+    assert (first, second) == (0, 0), "Exit status should be zero"
+    assert len(list(tmp_path.glob("*.csv"))) == 3
+    assert len(list(tmp_path.glob("*.vtt"))) == 3
+    with open(report) as file:
+        summary = json.load(file)
+    assert len(summary["succeeded"]) == 3
+    for result in summary["succeeded"]:
+        assert [Path(x).suffix for x in result["output"]] == [".csv", ".vtt"]
+    assert summary["skipped"] == []
+
+    # A corpus database instead of formats
+    database = tmp_path / "corpus.db"
+    assert tscribe.cli.main([str(tmp_path), "--corpus", str(database), "-j", "1"]) == 0
+    conn = sqlite3.connect(database)
+    assert conn.execute("SELECT COUNT(*) FROM jobs").fetchone() == (3,)
+    conn.close()
+    assert not list(tmp_path.glob("*.docx")), "Formats should not be written"
+
+
+@pytest.mark.parametrize(
+    "argv,formats",
+    [
+        (["a.json"], ["docx"]),
+        (["-f", "csv,vtt", "a.json"], ["csv", "vtt"]),
+        (["-f", "csv", "-f", "vtt", "a.json", "b.json"], ["csv", "vtt"]),
+        (["a.json", "--format", "srt", "-f", "srt,docx"], ["srt", "docx"]),
+    ],
+)
+def test_cli_formats(argv, formats):
+    """
+    Test output formats on the command line
+
+    GIVEN formats before or after the inputs, comma-separated or repeated
+    WHEN parsing the arguments
+    THEN the inputs are kept apart from the formats
+    """
+
+    logging.info("test_cli_formats")
+
+    # GIVEN formats before or after the inputs, comma-separated or repeated
+    # WHEN parsing the arguments
+    args = tscribe.cli.parse_args(argv)
+
+    # THEN the inputs are kept apart from the formats
+    assert args.format == formats
+    assert args.inputs == [x for x in argv if x.endswith(".json")]
+
+    with pytest.raises(SystemExit):
+        tscribe.cli.parse_args(["-f", "csv,pdf", "a.json"])
+
+
+def test_cli_incremental(tmp_path):
+    """
+    Test the command line interface rebuilding only stale outputs
+
+    GIVEN a directory of sample files converted incrementally
+    WHEN running tscribe on the directory incrementally again
+    THEN manifests are not taken for transcripts and outputs are reported skipped
+    """
+
+    logging.info("test_cli_incremental")
+
+    # GIVEN a directory of sample files converted incrementally
+    for sample in sample_files[:3]:
+        (tmp_path / Path(sample).name).write_bytes(Path(sample).read_bytes())
+    arguments = [str(tmp_path), "-f", "csv,sqlite", "-j", "1", "--incremental"]
+    assert tscribe.cli.main(arguments) == 0
+
+    # WHEN running tscribe on the directory incrementally again
+    report = tmp_path / "report.txt"
+    status = tscribe.cli.main(arguments + ["--report", str(report)])
+
+    # THEN manifests are not taken for transcripts and outputs are reported skipped
+    assert status == 0, "Exit status should be zero"
+    assert len(tscribe.cli.find_transcripts([str(tmp_path)])) == 3
+    with open(report) as file:
+        summary = json.load(file)
+    assert summary["succeeded"] == [] and summary["failed"] == []
+    assert len(summary["skipped"]) == 6
+
+
 @pytest.mark.parametrize("input_file", sample_files)
 @pytest.mark.parametrize("output_format", ["docx", "csv", "sqlite"])
 @pytest.mark.parametrize("location", [".", "output"])
@@ -1,34 +1,188 @@
 """ Transform AWS Transcribe json files to docx, csv, sqlite and vtt. """
 
-from docx import Document
-from docx.shared import Cm, Mm, Inches, RGBColor
-from docx.enum.text import WD_ALIGN_PARAGRAPH
 import json, datetime
-import matplotlib.pyplot as plt
-import statistics
+import contextlib
+import functools
+import importlib
+import io
+import itertools
+import os
 from pathlib import Path
 from time import perf_counter
-import pandas
 import sqlite3
-import webvtt
+import sys
+import tempfile
 import logging
+from .cache import ChartCache, data_digest, file_digest
+from .records import Segment, Word
+from .stream import iter_json_path, read_outline
+
+# python-docx, matplotlib and pandas are slow to import, so each is
+# imported inside the writer that needs it rather than at module level
+
+__version__ = "1.3.1"
+
+# json parsers in order of preference, the first installed is used by default
+JSON_BACKENDS = ["orjson", "simdjson", "ujson", "json"]
+
+# Tables of the shared corpus database, one row per job, segment and word
+CORPUS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    job_name TEXT NOT NULL,
+    source TEXT NOT NULL UNIQUE,
+    ingested_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    job_id INTEGER NOT NULL REFERENCES jobs (id),
+    segment INTEGER NOT NULL,
+    start_time REAL NOT NULL,
+    end_time REAL NOT NULL,
+    speaker TEXT NOT NULL,
+    comment TEXT NOT NULL,
+    PRIMARY KEY (job_id, segment)
+);
+CREATE TABLE IF NOT EXISTS words (
+    job_id INTEGER NOT NULL REFERENCES jobs (id),
+    segment INTEGER NOT NULL,
+    start_time REAL NOT NULL,
+    end_time REAL NOT NULL,
+    speaker TEXT NOT NULL,
+    content TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    punctuation TEXT NOT NULL
+);
+"""
+
+# Full-text indexes of the corpus, reading their text from the tables by rowid
+CORPUS_FTS = {
+    "segments_fts": "CREATE VIRTUAL TABLE segments_fts"
+    " USING fts5(comment, content='segments')",
+    "words_fts": "CREATE VIRTUAL TABLE words_fts USING fts5(content, content='words')",
+}
+
+# Built after ingestion, rather than maintained row by row during it
+CORPUS_INDEXES = """
+CREATE INDEX IF NOT EXISTS segments_speaker ON segments (speaker, job_id);
+CREATE INDEX IF NOT EXISTS segments_time ON segments (start_time);
+CREATE INDEX IF NOT EXISTS words_job ON words (job_id, segment);
+CREATE INDEX IF NOT EXISTS words_speaker ON words (speaker, job_id);
+CREATE INDEX IF NOT EXISTS words_time ON words (start_time);
+"""
+
+# Namespace of the main part of a Word document
+WORDPROCESSINGML = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+# Default file suffix of each output format
+OUTPUT_SUFFIXES = {
+    "docx": ".docx",
+    "csv": ".csv",
+    "sqlite": ".db",
+    "vtt": ".vtt",
+    "srt": ".srt",
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+}
+
+# Columns of the word-level parquet and arrow outputs
+WORD_COLUMNS = [
+    "job_name",
+    "item",
+    "type",
+    "alternative",
+    "content",
+    "confidence",
+    "start_time",
+    "end_time",
+    "speaker",
+    "channel",
+]
+
+
+def convert_time_stamp(timestamp: float) -> str:
+    """ Function to help convert timestamps from s to H:M:S """
+    minutes, seconds = divmod(int(float(timestamp)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
 
 
-def convert_time_stamp(timestamp: str) -> str:
-    """ Function to help convert timestamps from s to H:M:S """
-    delta = datetime.timedelta(seconds=float(timestamp))
-    seconds = delta - datetime.timedelta(microseconds=delta.microseconds)
-    return str(seconds)
+def format_cue_time(timestamp: float, separator: str = ".") -> str:
+    """Convert seconds to HH:MM:SS.mmm, keeping milliseconds for captions"""
+    seconds, milliseconds = divmod(round(float(timestamp) * 1000), 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{milliseconds:03d}"
+
+
+@functools.lru_cache(maxsize=None)
+def json_loads(backend: str = None):
+    """loads function of a json backend, by default the first installed"""
+    if backend is None:
+        for name in JSON_BACKENDS:
+            try:
+                return json_loads(name)
+            except ImportError:
+                continue
 
+    if backend not in JSON_BACKENDS:
+        raise Exception(f"json backend should be one of {', '.join(JSON_BACKENDS)}")
 
-def load_json_as_dict(filepath: str) -> dict:
-    """Load in JSON file and return as dict"""
+    logging.debug("Parsing json with %s", backend)
+    return importlib.import_module(backend).loads
+
+
+def is_path(source) -> bool:
+    """Whether a transcript source names a file, rather than holding its json"""
+    return isinstance(source, (str, os.PathLike))
+
+
+def load_json_as_dict(filepath, backend: str = None) -> dict:
+    """Load in JSON file and return as dict
+
+    filepath may also be json bytes, a file object or an already loaded dict,
+    which are checked in the same way. backend names one of JSON_BACKENDS,
+    by default the fastest installed.
+    """
     logging.info("Loading json")
 
+    loads = json_loads(backend)
+
+    if isinstance(filepath, dict):
+        data = filepath
+    elif isinstance(filepath, (bytes, bytearray, memoryview)):
+        data = loads(bytes(filepath))
+    elif hasattr(filepath, "read"):
+        data = loads(filepath.read())
+    else:
+        json_filepath = Path(filepath)
+        assert json_filepath.is_file(), "JSON file does not exist"
+
+        # One buffered read of the whole file, closed straight away
+        with open(json_filepath, "rb") as file:
+            data = loads(file.read())
+
+    assert "jobName" in data
+    assert "results" in data
+    assert "status" in data
+
+    assert data["status"] == "COMPLETED", "JSON file not shown as completed."
+
+    logging.debug("json checks psased")
+    return data
+
+
+def load_json_as_stream(filepath: str) -> dict:
+    """Check JSON file and return as dict, streaming results from disk
+
+    Results hold single-use generators in place of the items, speaker segments
+    and channel items, so that large transcripts are never fully in memory.
+    """
+    logging.info("Streaming json")
+
     json_filepath = Path(filepath)
     assert json_filepath.is_file(), "JSON file does not exist"
 
-    data = json.load(open(json_filepath.absolute(), "r", encoding="utf-8"))
+    data = read_outline(json_filepath, depth=2)
     assert "jobName" in data
     assert "results" in data
     assert "status" in data
@@ -36,228 +190,360 @@ def load_json_as_dict(filepath: str) -> dict:
     assert data["status"] == "COMPLETED", "JSON file not shown as completed."
 
     logging.debug("json checks psased")
+
+    def stream(*path):
+        """Values at results/path, dropping their indices"""
+        for _, value in iter_json_path(json_filepath, ("results",) + path):
+            yield value
+
+    def channel_items(channel):
+        """Items of a single channel"""
+        path = ("results", "channel_labels", "channels", None, "items", None)
+        for indices, item in iter_json_path(json_filepath, path):
+            if indices[0] == channel:
+                yield item
+
+    results = {"items": stream("items", None)}
+
+    if "speaker_labels" in data["results"]:
+        results["speaker_labels"] = {
+            "segments": stream("speaker_labels", "segments", None)
+        }
+
+    elif "channel_labels" in data["results"]:
+        labels = list(stream("channel_labels", "channels", None, "channel_label"))
+        results["channel_labels"] = {
+            "channels": [
+                {"channel_label": label, "items": channel_items(channel)}
+                for channel, label in enumerate(labels)
+            ]
+        }
+
+    data["results"] = results
     return data
 
 
-def calculate_confidence_statistics(data: dict) -> dict:
-    """Confidence Statistics"""
-    logging.info("Gathering confidence statistics")
+def best_alternative(alternatives: list) -> dict:
+    """The most confident of an item's alternatives, comparing numbers not strings
 
-    # Stats dictionary
-    stats = {
-        "timestamps": [],
-        "accuracy": [],
-        "9.8": 0,
-        "9": 0,
-        "8": 0,
-        "7": 0,
-        "6": 0,
-        "5": 0,
-        "4": 0,
-        "3": 0,
-        "2": 0,
-        "1": 0,
-        "0": 0,
-        "total": len(data["results"]["items"]),
-    }
+    Ties go to the earliest, as Transcribe lists the alternatives best first.
+    """
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return max(alternatives, key=lambda x: float(x["confidence"]))
 
-    # Confidence count
-    for item in data["results"]["items"]:
-        if item["type"] == "pronunciation":
 
-            stats["timestamps"].append(float(item["start_time"]))
+def decode_words(items) -> list:
+    """Decode items in a single pass into words with their trailing punctuation
 
-            confidence_decimal = float(item["alternatives"][0]["confidence"])
-            confidence_integer = int(confidence_decimal * 100)
+    Each word is a compact Word record, its text interned so that repeated
+    words share one string.
+    """
+    logging.info("Decoding words")
 
-            stats["accuracy"].append(confidence_integer)
+    words = []
+    previous_type = None
+    intern = sys.intern
 
-            if confidence_decimal >= 0.98:
-                stats["9.8"] += 1
-            else:
-                rough_confidence = str(int(confidence_decimal * 10))
-                stats[rough_confidence] += 1
+    for item in items:
 
-    return stats
+        if item["type"] == "pronunciation":
+            result = best_alternative(item["alternatives"])
+            words.append(
+                Word(
+                    intern(result["content"]),
+                    float(result["confidence"]),
+                    float(item["start_time"]),
+                    float(item["end_time"]),
+                )
+            )
 
+        # Punctuation directly after a word is written with that word
+        elif previous_type == "pronunciation":
+            words[-1].punctuation = intern(item["alternatives"][0]["content"])
 
-def make_graph_png(stats: dict, directory: str) -> str:
-    """Make scatter graph from confidence statistics"""
-    logging.info("Making graph")
+        previous_type = item["type"]
 
-    # Confidence of each word as scatter graph
-    plt.scatter(stats["timestamps"], stats["accuracy"])
+    return words
 
-    # Mean average as line across graph
-    plt.plot(
-        [stats["timestamps"][0], stats["timestamps"][-1]],
-        [statistics.mean(stats["accuracy"]), statistics.mean(stats["accuracy"])],
-        "r",
-    )
 
-    # Formatting
-    plt.xlabel("Time (seconds)")
-    plt.ylabel("Accuracy (percent)")
-    plt.yticks(range(0, 101, 10))
-    plt.title("Accuracy during transcript")
-    plt.legend(["Accuracy average (mean)", "Individual words"], loc="lower center")
+def build_channel_index(data: dict) -> dict:
+    """Map (start_time, end_time) of each pronunciation to its channel label"""
+    logging.info("Indexing channels")
 
-    # Target filename, including directory for explicit path
-    filename = Path(directory) / Path("chart.png")
-    plt.savefig(str(filename))
-    logging.info("Graph saved to %s", filename)
-    plt.clf()
+    channel_index = {}
+    if "channel_labels" not in data["results"].keys():
+        return channel_index
 
-    return str(filename)
+    for channel in data["results"]["channel_labels"]["channels"]:
+        for item in channel["items"]:
+            if item["type"] == "pronunciation":
+                channel_index.setdefault(
+                    (float(item["start_time"]), float(item["end_time"])),
+                    channel["channel_label"],
+                )
 
+    return channel_index
 
-def decode_transcript_to_dataframe(data: str):
-    """Decode the transcript into a pandas dataframe"""
+
+def decode_transcript(data: dict, channel_index: dict = None) -> dict:
+    """Decode the transcript into segments of words, shared by every writer"""
     logging.info("Decoding transcript")
 
-    decoded_data = {"start_time": [], "end_time": [], "speaker": [], "comment": []}
+    # Accept json bytes, a file object or a path, as well as a loaded dict
+    if not isinstance(data, dict):
+        data = load_json_as_dict(data)
+
+    # Items may be a list or a generator, so they are walked exactly once
+    words = decode_words(data["results"]["items"])
+    segments = []
 
     # If speaker identification
     if "speaker_labels" in data["results"].keys():
         logging.debug("Transcipt has speaker_labels")
 
+        word_index = {}
+        for word in words:
+            word_index.setdefault((word.start_time, word.end_time), word)
+
         # A segment is a blob of pronounciation and punctuation by an individual speaker
         for segment in data["results"]["speaker_labels"]["segments"]:
 
             # If there is content in the segment, add a row, write the time and speaker
             if len(segment["items"]) > 0:
-                decoded_data["start_time"].append(
-                    convert_time_stamp(segment["start_time"])
-                )
-                decoded_data["end_time"].append(convert_time_stamp(segment["end_time"]))
-                decoded_data["speaker"].append(segment["speaker_label"])
-                decoded_data["comment"].append("")
-
-                # For each word in the segment...
-                for word in segment["items"]:
-
-                    # Get the word with the highest confidence
-                    pronunciations = list(
-                        filter(
-                            lambda x: x["type"] == "pronunciation",
-                            data["results"]["items"],
-                        )
-                    )
-                    word_result = list(
-                        filter(
-                            lambda x: x["start_time"] == word["start_time"]
-                            and x["end_time"] == word["end_time"],
-                            pronunciations,
-                        )
-                    )
-                    result = sorted(
-                        word_result[-1]["alternatives"], key=lambda x: x["confidence"]
-                    )[-1]
-
-                    # Write the word
-                    decoded_data["comment"][-1] += " " + result["content"]
-
-                    # If the next item is punctuation, write it
-                    try:
-                        word_result_index = data["results"]["items"].index(
-                            word_result[0]
-                        )
-                        next_item = data["results"]["items"][word_result_index + 1]
-                        if next_item["type"] == "punctuation":
-                            decoded_data["comment"][-1] += next_item["alternatives"][0][
-                                "content"
+                segments.append(
+                    Segment(
+                        float(segment["start_time"]),
+                        float(segment["end_time"]),
+                        sys.intern(segment["speaker_label"]),
+                        [
+                            word_index[
+                                (float(word["start_time"]), float(word["end_time"]))
                             ]
-                    except IndexError:
-                        pass
+                            for word in segment["items"]
+                        ],
+                    )
+                )
 
     # If channel identification
     elif "channel_labels" in data["results"].keys():
         logging.debug("Transcipt has channel_labels")
 
-        # For each word in the results
-        for word in data["results"]["items"]:
+        if channel_index is None:
+            channel_index = build_channel_index(data)
 
-            # Punctuation items do not include a start_time
-            if "start_time" not in word.keys():
-                continue
+        for word in words:
 
             # Identify the channel
-            channel = list(
-                filter(
-                    lambda x: word in x["items"],
-                    data["results"]["channel_labels"]["channels"],
-                )
-            )[0]["channel_label"]
-
-            # If still on the same channel, add the current word to the line
-            if (
-                channel in decoded_data["speaker"]
-                and decoded_data["speaker"][-1] == channel
-            ):
-                current_word = sorted(
-                    word["alternatives"], key=lambda x: x["confidence"]
-                )[-1]
-                decoded_data["comment"][-1] += " " + current_word["content"]
-
-            # Else start a new line
-            else:
-                decoded_data["start_time"].append(
-                    convert_time_stamp(word["start_time"])
+            channel = channel_index[(word.start_time, word.end_time)]
+
+            # Start a new segment whenever the channel changes
+            if not segments or segments[-1].speaker != channel:
+                segments.append(
+                    Segment(word.start_time, word.end_time, sys.intern(channel), [])
                 )
-                decoded_data["end_time"].append(convert_time_stamp(word["end_time"]))
-                decoded_data["speaker"].append(channel)
-                current_word = sorted(
-                    word["alternatives"], key=lambda x: x["confidence"]
-                )[-1]
-                decoded_data["comment"].append(current_word["content"])
-
-            # If the next item is punctuation, write it
-            try:
-                word_result_index = data["results"]["items"].index(word)
-                next_item = data["results"]["items"][word_result_index + 1]
-                if next_item["type"] == "punctuation":
-                    decoded_data["comment"][-1] += next_item["alternatives"][0][
-                        "content"
-                    ]
-            except IndexError:
-                pass
+
+            segments[-1].words.append(word)
+            segments[-1].end_time = word.end_time
 
     # Neither speaker nor channel identification
     else:
         logging.debug("No speaker_labels or channel_labels")
 
-        decoded_data["start_time"] = convert_time_stamp(
-            list(
-                filter(lambda x: x["type"] == "pronunciation", data["results"]["items"])
-            )[0]["start_time"]
-        )
-        decoded_data["end_time"] = convert_time_stamp(
-            list(
-                filter(lambda x: x["type"] == "pronunciation", data["results"]["items"])
-            )[-1]["end_time"]
-        )
-        decoded_data["speaker"].append("")
-        decoded_data["comment"].append("")
+        if words:
+            segments.append(Segment(words[0].start_time, words[-1].end_time, "", words))
 
-        # Add words
-        for word in data["results"]["items"]:
+    return {"job_name": data["jobName"], "segments": segments}
 
-            # Get the word with the highest confidence
-            result = sorted(word["alternatives"], key=lambda x: x["confidence"])[-1]
 
-            # Write the word
-            decoded_data["comment"][-1] += " " + result["content"]
+def confidence_arrays(transcript: dict) -> dict:
+    """Columns of start time, confidence and punctuation for every word"""
+    import numpy
 
-            # If the next item is punctuation, write it
-            try:
-                word_result_index = data["results"]["items"].index(word)
-                next_item = data["results"]["items"][word_result_index + 1]
-                if next_item["type"] == "punctuation":
-                    decoded_data["comment"][-1] += next_item["alternatives"][0][
-                        "content"
-                    ]
-            except IndexError:
-                pass
+    # Accept json, as bytes, a file or a loaded dict, as well as a decoded transcript
+    if not isinstance(transcript, dict) or "results" in transcript:
+        transcript = decode_transcript(transcript)
+
+    words = [word for segment in transcript["segments"] for word in segment.words]
+
+    return {
+        "timestamps": numpy.fromiter(
+            (x.start_time for x in words), dtype=float, count=len(words)
+        ),
+        "confidence": numpy.fromiter(
+            (x.confidence for x in words), dtype=float, count=len(words)
+        ),
+        "punctuation": numpy.fromiter(
+            (bool(x.punctuation) for x in words), dtype=bool, count=len(words)
+        ),
+    }
+
+
+def calculate_confidence_statistics(transcript: dict) -> dict:
+    """Confidence Statistics"""
+    logging.info("Gathering confidence statistics")
+
+    import numpy
+
+    columns = confidence_arrays(transcript)
+    confidence = columns["confidence"]
+    accuracy = (confidence * 100).astype(int)
+
+    # Words below 0.98 are counted in buckets of a tenth
+    rough_confidence = (confidence[confidence < 0.98] * 10).astype(int)
+    buckets = numpy.bincount(rough_confidence, minlength=10)
+
+    # Spread of accuracy, in percent
+    percentiles = [5, 25, 50, 75, 95]
+    if accuracy.size:
+        mean = float(accuracy.mean())
+        values = numpy.percentile(accuracy, percentiles).tolist()
+    else:
+        mean = 0.0
+        values = [0.0] * len(percentiles)
+
+    # Stats dictionary
+    stats = {
+        "timestamps": columns["timestamps"].tolist(),
+        "accuracy": accuracy.tolist(),
+        "9.8": int(numpy.count_nonzero(confidence >= 0.98)),
+        "9": int(buckets[9]),
+        "8": int(buckets[8]),
+        "7": int(buckets[7]),
+        "6": int(buckets[6]),
+        "5": int(buckets[5]),
+        "4": int(buckets[4]),
+        "3": int(buckets[3]),
+        "2": int(buckets[2]),
+        "1": int(buckets[1]),
+        "0": int(buckets[0]),
+        # Words and their punctuation both count towards the total
+        "total": int(confidence.size + numpy.count_nonzero(columns["punctuation"])),
+        "mean": mean,
+        "percentiles": dict(zip(percentiles, values)),
+    }
+
+    return stats
+
+
+def bin_scatter(timestamps, accuracy, windows: int):
+    """Reduce a scatter to one point per accuracy value in each time window
+
+    Every distinct accuracy still appears in its part of the transcript, so
+    outlying words stay visible while the point count is bounded.
+    """
+    import numpy
+
+    timestamps = numpy.asarray(timestamps, dtype=float)
+    accuracy = numpy.asarray(accuracy, dtype=int)
+
+    edges = numpy.linspace(timestamps.min(), timestamps.max(), windows + 1)
+    window = numpy.searchsorted(edges, timestamps, "right") - 1
+    window = numpy.clip(window, 0, windows - 1)
+
+    # Accuracy is a whole percentage, so pairs pack into a single integer
+    pairs = numpy.unique(window * 101 + accuracy)
+    centres = (edges[:-1] + edges[1:]) / 2
+
+    return centres[pairs // 101], pairs % 101
+
+
+def scatter_points(timestamps, accuracy, max_points: int = 5000):
+    """Points of the confidence scatter, binned to at most max_points
+
+    Windows start at a tenth of max_points and are halved until the distinct
+    accuracies within them fit. As accuracy has 101 possible values, a
+    max_points below 101 still allows up to 101 points in a single window.
+    """
+    if len(timestamps) <= max_points:
+        return timestamps, accuracy
+
+    logging.debug("Binning %s points", len(timestamps))
+    fewest = max(max_points // 101, 1)
+    windows = max(max_points // 10, fewest)
+    while True:
+        binned = bin_scatter(timestamps, accuracy, windows)
+        if len(binned[0]) <= max_points or windows == fewest:
+            return binned
+        windows = max(windows // 2, fewest)
+
+
+def make_graph(stats: dict, max_points: int = 5000) -> bytes:
+    """Make scatter graph from confidence statistics, as png bytes
+
+    At most max_points words are plotted, see scatter_points.
+    """
+    logging.info("Making graph")
+
+    # A figure of its own, not pyplot's global state, so charts can be drawn
+    # from several threads at once
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+
+    # Past max_points, plot each accuracy once per time window
+    timestamps, accuracy = scatter_points(
+        stats["timestamps"], stats["accuracy"], max_points
+    )
+
+    # Confidence of each word as scatter graph
+    axes.scatter(timestamps, accuracy, label="Individual words")
+
+    # Mean average as line across graph
+    axes.plot(
+        [stats["timestamps"][0], stats["timestamps"][-1]],
+        [stats["mean"], stats["mean"]],
+        "r",
+        label="Accuracy average (mean)",
+    )
+
+    # Formatting
+    axes.set_xlabel("Time (seconds)")
+    axes.set_ylabel("Accuracy (percent)")
+    axes.set_yticks(range(0, 101, 10))
+    axes.set_title("Accuracy during transcript")
+    axes.legend(loc="lower center")
+
+    # Render in memory, leaving nothing on disk
+    graph = io.BytesIO()
+    figure.savefig(graph, format="png")
+
+    return graph.getvalue()
+
+
+def make_graph_png(stats: dict, directory: str, max_points: int = 5000) -> str:
+    """Make scatter graph from confidence statistics and save as chart.png"""
+
+    # Target filename, including directory for explicit path
+    filename = Path(directory) / Path("chart.png")
+    filename.write_bytes(make_graph(stats, max_points))
+    logging.info("Graph saved to %s", filename)
+
+    return str(filename)
+
+
+def decode_transcript_to_dataframe(transcript: dict):
+    """Decode the transcript into a pandas dataframe"""
+    logging.info("Building dataframe")
+
+    import pandas
+
+    # Accept json, as bytes, a file or a loaded dict, as well as a decoded transcript
+    if not isinstance(transcript, dict) or "results" in transcript:
+        transcript = decode_transcript(transcript)
+
+    decoded_data = {"start_time": [], "end_time": [], "speaker": [], "comment": []}
+
+    for segment in transcript["segments"]:
+        decoded_data["start_time"].append(convert_time_stamp(segment.start_time))
+        decoded_data["end_time"].append(convert_time_stamp(segment.end_time))
+        decoded_data["speaker"].append(segment.speaker)
+        decoded_data["comment"].append(
+            "".join(" " + word.content + word.punctuation for word in segment.words)
+        )
 
     # Produce pandas dataframe
     dataframe = pandas.DataFrame(
@@ -270,11 +556,11 @@ def decode_transcript_to_dataframe(data: str):
     return dataframe
 
 
-def write_docx(data, filename, **kwargs):
-    """ Write a transcript from the .json transcription file. """
-    logging.info("Writing docx")
-
-    output_filename = Path(filename)
+@functools.lru_cache(maxsize=None)
+def docx_template() -> bytes:
+    """Blank A4 document in Calibri, prepared once per process"""
+    from docx import Document
+    from docx.shared import Mm
 
     # Initiate Document
     document = Document()
@@ -285,11 +571,84 @@ def write_docx(data, filename, **kwargs):
     font = document.styles["Normal"].font
     font.name = "Calibri"
 
+    template = io.BytesIO()
+    document.save(template)
+    return template.getvalue()
+
+
+def coalesce_runs(words: list, threshold_for_grey: float) -> list:
+    """Group words into [grey, text] runs of the same colour
+
+    Punctuation is never grey, so joins the black run it follows.
+    """
+    runs = []
+
+    for word in words:
+        grey = word.confidence < threshold_for_grey
+        if runs and runs[-1][0] == grey:
+            runs[-1][1] += " " + word.content
+        else:
+            runs.append([grey, " " + word.content])
+
+        if word.punctuation:
+            if runs[-1][0]:
+                runs.append([False, word.punctuation])
+            else:
+                runs[-1][1] += word.punctuation
+
+    return runs
+
+
+def transcript_rows_xml(transcript: dict, threshold_for_grey: float, widths) -> str:
+    """Transcript table rows as WordprocessingML, one row per segment"""
+    # Imported here, as xml.sax pulls in urllib and email at import time
+    from xml.sax.saxutils import escape
+
+    def cell(width, runs):
+        return (
+            f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width.twips}"/></w:tcPr>'
+            f"<w:p>{runs}</w:p></w:tc>"
+        )
+
+    def run(text, grey=False):
+        colour = '<w:rPr><w:color w:val="CCCCCC"/></w:rPr>' if grey else ""
+        return f'<w:r>{colour}<w:t xml:space="preserve">{escape(text)}</w:t></w:r>'
+
+    rows = []
+    for segment in transcript["segments"]:
+        runs = coalesce_runs(segment.words, threshold_for_grey)
+        rows.append(
+            "<w:tr>"
+            + cell(widths[0], run(convert_time_stamp(segment.start_time)))
+            + cell(widths[1], run(str(segment.speaker)))
+            + cell(widths[2], "".join(run(text, grey) for grey, text in runs))
+            + "</w:tr>"
+        )
+
+    return f'<w:tbl xmlns:w="{WORDPROCESSINGML}">{"".join(rows)}</w:tbl>'
+
+
+def write_docx(transcript, filename, **kwargs):
+    """ Write a transcript from the .json transcription file. """
+    logging.info("Writing docx")
+
+    from docx import Document
+    from docx.oxml import parse_xml
+    from docx.shared import Cm, Inches, RGBColor
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+    # Accept json, as bytes, a file or a loaded dict, as well as a decoded transcript
+    if not isinstance(transcript, dict) or "results" in transcript:
+        transcript = decode_transcript(transcript)
+
+    # Initiate Document
+    document = Document(io.BytesIO(docx_template()))
+
     # Document title and intro
-    title = f"Transcription of {data['jobName']}"
+    title = f"Transcription of {transcript['job_name']}"
     document.add_heading(title, level=1)
     # Set thresholds for formatting later
-    threshold_for_grey = 0.98
+    threshold_for_grey = kwargs.get("grey_threshold", 0.98)
     # Intro
     document.add_paragraph(
         "Transcription using AWS Transcribe automatic speech recognition and"
@@ -300,11 +659,11 @@ def write_docx(data, filename, **kwargs):
     )
     document.add_paragraph()  # Spacing
     document.add_paragraph(
-        f"Grey text has less than {int(threshold_for_grey * 100)}% confidence."
+        f"Grey text has less than {threshold_for_grey * 100:g}% confidence."
     )
 
-    # Get stats
-    stats = calculate_confidence_statistics(data)
+    # Get stats, unless already known
+    stats = kwargs.get("stats") or calculate_confidence_statistics(transcript)
 
     # Display confidence count table
     table = document.add_table(rows=1, cols=3)
@@ -361,7 +720,7 @@ def write_docx(data, filename, **kwargs):
     # Add paragraph for spacing
     document.add_paragraph()
 
-    graph = make_graph_png(stats, str(output_filename.parent))
+    graph = io.BytesIO(kwargs.get("chart") or make_graph(stats))
     document.add_picture(graph, width=Cm(14.64))
     document.paragraphs[-1].alignment = WD_ALIGN_PARAGRAPH.CENTER
     document.add_page_break()
@@ -374,270 +733,969 @@ def write_docx(data, filename, **kwargs):
     hdr_cells[1].text = "Speaker"
     hdr_cells[2].text = "Content"
 
-    # If speaker identification
-    if "speaker_labels" in data["results"].keys():
-        logging.debug("Transcript has speaker_labels")
+    # Formatting transcript table widthds
+    widths = (Inches(0.6), Inches(1), Inches(4.5))
+    for idx, width in enumerate(widths):
+        hdr_cells[idx].width = width
 
-        # A segment is a blob of pronounciation and punctuation by an individual speaker
-        for segment in data["results"]["speaker_labels"]["segments"]:
+    # Generate the rows as xml in bulk, rather than a python-docx run per word
+    if kwargs.get("fast_docx", True):
+        rows = parse_xml(transcript_rows_xml(transcript, threshold_for_grey, widths))
+        table._tbl.extend(list(rows))
 
-            # If there is content in the segment, add a row, write the time and speaker
-            if len(segment["items"]) > 0:
-                row_cells = table.add_row().cells
-                row_cells[0].text = convert_time_stamp(segment["start_time"])
-                row_cells[1].text = str(segment["speaker_label"])
-
-                # For each word in the segment...
-                for word in segment["items"]:
-
-                    # Get the word with the highest confidence
-                    pronunciations = list(
-                        filter(
-                            lambda x: x["type"] == "pronunciation",
-                            data["results"]["items"],
-                        )
-                    )
-                    word_result = list(
-                        filter(
-                            lambda x: x["start_time"] == word["start_time"]
-                            and x["end_time"] == word["end_time"],
-                            pronunciations,
-                        )
-                    )
-                    result = sorted(
-                        word_result[-1]["alternatives"], key=lambda x: x["confidence"]
-                    )[-1]
-
-                    # Write the word
-                    run = row_cells[2].paragraphs[0].add_run(" " + result["content"])
-                    if float(result["confidence"]) < threshold_for_grey:
-                        font = run.font
-                        font.color.rgb = RGBColor(204, 204, 204)
-
-                    # If the next item is punctuation, write it
-                    try:
-                        word_result_index = data["results"]["items"].index(
-                            word_result[0]
-                        )
-                        next_item = data["results"]["items"][word_result_index + 1]
-                        if next_item["type"] == "punctuation":
-                            run = (
-                                row_cells[2]
-                                .paragraphs[0]
-                                .add_run(next_item["alternatives"][0]["content"])
-                            )
-                    except IndexError:
-                        pass
+    # A segment is a blob of pronounciation and punctuation by an individual speaker
+    else:
+        for segment in transcript["segments"]:
+            row_cells = table.add_row().cells
+            row_cells[0].text = convert_time_stamp(segment.start_time)
+            row_cells[1].text = str(segment.speaker)
+
+            # Write the words, a run for each change of colour
+            for grey, text in coalesce_runs(segment.words, threshold_for_grey):
+                run = row_cells[2].paragraphs[0].add_run(text)
+                if grey:
+                    font = run.font
+                    font.color.rgb = RGBColor(204, 204, 204)
 
-    # If channel identification
-    elif "channel_labels" in data["results"].keys():
-        logging.debug("Transcript has channel_labels")
+            for idx, width in enumerate(widths):
+                row_cells[idx].width = width
+
+    # Save
+    document.save(filename)
+    logging.info("Docx saved to %s", filename)
 
-        for word in data["results"]["items"]:
 
-            # Punctuation items do not include a start_time
-            if "start_time" not in word.keys():
-                continue
+def iter_word_rows(data: dict, channel_index: dict = None):
+    """Yield a row of WORD_COLUMNS for each alternative of every item
 
-            # Identify the channel
-            channel = list(
-                filter(
-                    lambda x: word in x["items"],
-                    data["results"]["channel_labels"]["channels"],
+    Alternatives are ranked from 0, the most confident. Punctuation has no
+    timings and takes the speaker and channel of the word before it.
+    """
+    results = data["results"]
+
+    speaker_index = {}
+    if "speaker_labels" in results:
+        for segment in results["speaker_labels"]["segments"]:
+            for item in segment["items"]:
+                speaker_index.setdefault(
+                    (float(item["start_time"]), float(item["end_time"])),
+                    segment["speaker_label"],
                 )
-            )[0]["channel_label"]
-
-            # If still on the same channel, add the current word to the line
-            if table.cell(-1, 1).text == channel:
-                current_word = sorted(
-                    word["alternatives"], key=lambda x: x["confidence"]
-                )[-1]
-
-                run = (
-                    table.cell(-1, 2)
-                    .paragraphs[0]
-                    .add_run(" " + current_word["content"])
+
+    if channel_index is None:
+        channel_index = build_channel_index(data)
+
+    job_name = data["jobName"]
+    speaker = channel = None
+
+    for position, item in enumerate(results["items"]):
+        start_time, end_time = item.get("start_time"), item.get("end_time")
+        if start_time is not None:
+            start_time, end_time = float(start_time), float(end_time)
+            speaker = speaker_index.get((start_time, end_time))
+            channel = channel_index.get((start_time, end_time))
+
+        # Ranked like best_alternative, which picks rank 0
+        alternatives = item["alternatives"]
+        if len(alternatives) > 1:
+            alternatives = sorted(
+                alternatives, key=lambda x: float(x["confidence"]), reverse=True
+            )
+        for rank, alternative in enumerate(alternatives):
+            yield (
+                job_name,
+                position,
+                item["type"],
+                rank,
+                alternative["content"],
+                float(alternative["confidence"]),
+                start_time,
+                end_time,
+                speaker,
+                channel,
+            )
+
+
+def write_words(data: dict, filename, output_format="parquet", batch_size=1 << 17):
+    """Output a row per word to parquet or an arrow ipc file, in columnar batches
+
+    filename may also be an open binary file.
+    """
+    logging.info("Writing %s", output_format)
+
+    # pyarrow is optional, only these formats need it
+    try:
+        import pyarrow
+    except ImportError:
+        raise Exception(
+            f"{output_format} output needs pyarrow, install it with"
+            " pip install tscribe[parquet]"
+        ) from None
+
+    schema = pyarrow.schema(
+        [
+            ("job_name", pyarrow.string()),
+            ("item", pyarrow.int64()),
+            ("type", pyarrow.string()),
+            ("alternative", pyarrow.int32()),
+            ("content", pyarrow.string()),
+            ("confidence", pyarrow.float64()),
+            ("start_time", pyarrow.float64()),
+            ("end_time", pyarrow.float64()),
+            ("speaker", pyarrow.string()),
+            ("channel", pyarrow.string()),
+        ]
+    )
+
+    # A binary file is written to directly
+    sink = filename if hasattr(filename, "write") else str(filename)
+
+    if output_format == "parquet":
+        import pyarrow.parquet
+
+        writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    else:
+        import pyarrow.ipc
+
+        writer = pyarrow.ipc.new_file(sink, schema)
+
+    # Rows are gathered a batch at a time, so memory stays bounded
+    rows = iter_word_rows(data)
+    with writer:
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            columns = zip(*batch)
+            writer.write_batch(
+                pyarrow.record_batch(
+                    [pyarrow.array(x, type=y.type) for x, y in zip(columns, schema)],
+                    schema=schema,
                 )
-                if float(current_word["confidence"]) < threshold_for_grey:
-                    font = run.font
-                    font.color.rgb = RGBColor(204, 204, 204)
+            )
 
-            # Else start a new line
-            else:
-                current_word = sorted(
-                    word["alternatives"], key=lambda x: x["confidence"]
-                )[-1]
+    logging.info("%s saved to %s", output_format, filename)
 
-                row_cells = table.add_row().cells
-                row_cells[0].text = convert_time_stamp(word["start_time"])
-                row_cells[1].text = channel
 
-                run = row_cells[2].paragraphs[0].add_run(" " + current_word["content"])
-                if float(current_word["confidence"]) < threshold_for_grey:
-                    font = run.font
-                    font.color.rgb = RGBColor(204, 204, 204)
+def write_sqlite(dataframe, transcript: dict, filename, **kwargs):
+    """Output to sqlite, with full-text indexes when fts is given
 
-            # If the next item is punctuation, write it
-            try:
-                word_result_index = data["results"]["items"].index(word)
-                next_item = data["results"]["items"][word_result_index + 1]
-                if next_item["type"] == "punctuation":
-                    run = (
-                        row_cells[2]
-                        .paragraphs[0]
-                        .add_run(next_item["alternatives"][0]["content"])
-                    )
-            except IndexError:
-                pass
+    The database is built in a temporary file that then replaces filename, so
+    an earlier output is rebuilt rather than added to. filename may also be
+    an open binary file, which gets the database's bytes.
+    """
+    logging.info("Writing sqlite")
 
-    # Else no speaker identification
+    to_file = hasattr(filename, "write")
+    if to_file:
+        conn = sqlite3.connect(":memory:")
     else:
-        logging.debug("No speaker_labels or channel_labels")
+        # Created by sqlite itself, so the output gets the usual umask mode
+        # rather than the private one of a mkstemp file
+        name = Path(filename).name
+        temporary = Path(filename).with_name(f".{name}.{os.urandom(8).hex()}.tmp")
+        conn = sqlite3.connect(str(temporary))
 
-        # Start the first row
-        row_cells = table.add_row().cells
+    try:
+        dataframe.to_sql("transcript", conn)
+        if kwargs.get("fts"):
+            add_full_text_index(conn, transcript, words=kwargs.get("fts_words"))
 
-        # Add words
-        for word in data["results"]["items"]:
+        # Copy an in-memory database out whole, through a file before python 3.11
+        if to_file:
+            if hasattr(conn, "serialize"):
+                filename.write(conn.serialize())
+            else:
+                with tempfile.TemporaryDirectory() as directory:
+                    copy = os.path.join(directory, "transcript.db")
+                    target = sqlite3.connect(copy)
+                    conn.backup(target)
+                    target.close()
+                    filename.write(Path(copy).read_bytes())
+        else:
+            conn.commit()
+            conn.close()
+            os.replace(temporary, filename)
+    except BaseException:
+        conn.close()
+        if not to_file:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temporary)
+        raise
+    finally:
+        conn.close()
 
-            # Get the word with the highest confidence
-            result = sorted(word["alternatives"], key=lambda x: x["confidence"])[-1]
+    logging.info("Sqlite saved to %s", filename)
 
-            # Write the word
-            run = row_cells[2].paragraphs[0].add_run(" " + result["content"])
-            if float(result["confidence"]) < threshold_for_grey:
-                font = run.font
-                font.color.rgb = RGBColor(204, 204, 204)
 
-            # If the next item is punctuation, write it
-            try:
-                word_result_index = data["results"]["items"].index(word)
-                next_item = data["results"]["items"][word_result_index + 1]
-                if next_item["type"] == "punctuation":
-                    run = (
-                        row_cells[2]
-                        .paragraphs[0]
-                        .add_run(next_item["alternatives"][0]["content"])
-                    )
-            except IndexError:
-                pass
+def add_full_text_index(conn, transcript: dict, words: bool = False):
+    """Build fts5 indexes of a transcript's sqlite output, in bulk
 
-    # Formatting transcript table widthds
-    widths = (Inches(0.6), Inches(1), Inches(4.5))
-    for row in table.rows:
-        for idx, width in enumerate(widths):
-            row.cells[idx].width = width
+    transcript_fts indexes segment comments, reading them from the transcript
+    table rather than storing them twice. With words, words_fts indexes each
+    word along with its timestamps, speaker and segment.
+    """
+    logging.info("Building full-text index")
 
-    # Save
-    document.save(filename)
-    logging.info("Docx saved to %s", filename)
+    conn.execute(
+        "CREATE VIRTUAL TABLE transcript_fts USING fts5(comment, content='transcript')"
+    )
+    conn.execute("INSERT INTO transcript_fts (transcript_fts) VALUES ('rebuild')")
 
+    if words:
+        conn.execute(
+            "CREATE VIRTUAL TABLE words_fts USING fts5(content, start_time UNINDEXED,"
+            " end_time UNINDEXED, speaker UNINDEXED, segment UNINDEXED)"
+        )
+        conn.executemany(
+            "INSERT INTO words_fts VALUES (?, ?, ?, ?, ?)",
+            (
+                (
+                    word.content,
+                    word.start_time,
+                    word.end_time,
+                    segment.speaker,
+                    position,
+                )
+                for position, segment in enumerate(transcript["segments"])
+                for word in segment.words
+            ),
+        )
 
-def write_vtt(dataframe, filename):
-    """Output to VTT format"""
-    logging.info("Writing VTT")
+    conn.commit()
 
-    # Initialize vtt
-    vtt = webvtt.WebVTT()
 
-    # Iterate through dataframe
-    for _, row in dataframe.iterrows():
+def wrap_caption(text: str, width: int = 80) -> list:
+    """Split caption text into lines shorter than width, breaking at spaces"""
+    lines = []
 
-        # If the segment has 80 or less characters
-        if len(row["comment"]) <= 80:
+    while len(text) > width:
+        last_space = text.rfind(" ", 0, width)
+        # A single word longer than the line is cut where it overflows
+        cut = last_space if last_space > 0 else width
+        lines.append(text[:cut])
+        text = text[cut:].lstrip()
 
-            caption = webvtt.Caption(
-                start=row["start_time"] + ".000",
-                end=row["end_time"] + ".000",
-                text=row["comment"],
-            )
+    if text:
+        lines.append(text)
 
-        # If the segment has more than 80 characters, use lines
-        else:
+    return lines
 
-            lines = []
-            text = row["comment"]
 
-            while len(text) > 80:
-                text = text.lstrip()
-                last_space = text[:80].rindex(" ")
-                lines.append(text[:last_space])
-                text = text[last_space:]
+def iter_cues(segments, separator: str = "."):
+    """Yield (start, end, speaker, lines) for each segment, timed to the millisecond"""
+    for segment in segments:
+        comment = "".join(
+            " " + word.content + word.punctuation for word in segment.words
+        ).lstrip()
+        yield (
+            format_cue_time(segment.start_time, separator),
+            format_cue_time(segment.end_time, separator),
+            segment.speaker,
+            wrap_caption(comment),
+        )
 
-            caption = webvtt.Caption(
-                row["start_time"] + ".000", row["end_time"] + ".000", lines
-            )
 
-        if row["speaker"]:
-            caption.identifier = row["speaker"]
+@contextlib.contextmanager
+def open_for_text(filename):
+    """Open a filename for writing text, or write through an open file"""
+    if not hasattr(filename, "write"):
+        with open(filename, "w", encoding="utf-8", newline="\n") as file:
+            yield file
+
+    elif isinstance(filename, io.TextIOBase):
+        yield filename
+
+    # A binary file is wrapped for text, and left open once written
+    else:
+        file = io.TextIOWrapper(filename, encoding="utf-8", newline="\n")
+        try:
+            yield file
+        finally:
+            file.flush()
+            file.detach()
+
+
+def write_vtt(transcript, filename):
+    """Output to VTT format, writing each cue to the file as it is made
+
+    filename may also be an open text or binary file.
+    """
+    logging.info("Writing VTT")
+
+    # Accept json, as bytes, a file or a loaded dict, as well as a decoded transcript
+    if not isinstance(transcript, dict) or "results" in transcript:
+        transcript = decode_transcript(transcript)
 
-        vtt.captions.append(caption)
+    with open_for_text(filename) as file:
+        file.write("WEBVTT\n")
+        for start, end, speaker, lines in iter_cues(transcript["segments"]):
+            file.write("\n")
+            if speaker:
+                file.write(f"{speaker}\n")
+            file.write(f"{start} --> {end}\n")
+            for line in lines:
+                file.write(f"{line}\n")
 
-    vtt.save(filename)
     logging.info("VTT saved to %s", filename)
 
 
+def write_srt(transcript, filename):
+    """Output to SRT format, writing each cue to the file as it is made
+
+    filename may also be an open text or binary file.
+    """
+    logging.info("Writing SRT")
+
+    # Accept json, as bytes, a file or a loaded dict, as well as a decoded transcript
+    if not isinstance(transcript, dict) or "results" in transcript:
+        transcript = decode_transcript(transcript)
+
+    with open_for_text(filename) as file:
+        cues = iter_cues(transcript["segments"], separator=",")
+        for number, (start, end, _, lines) in enumerate(cues, start=1):
+            if number > 1:
+                file.write("\n")
+            file.write(f"{number}\n{start} --> {end}\n")
+            for line in lines:
+                file.write(f"{line}\n")
+
+    logging.info("SRT saved to %s", filename)
+
+
+def manifest_path(output_filepath) -> Path:
+    """Hidden file beside an output, recording how it was produced
+
+    Not named .json, so it is never mistaken for a transcript.
+    """
+    output_filepath = Path(output_filepath)
+    return output_filepath.with_name(f".{output_filepath.name}.tscribe")
+
+
+def output_options(output_format: str, kwargs: dict) -> dict:
+    """Options that change the content of an output format"""
+    options = {"format": output_format}
+    if output_format == "docx":
+        options["grey_threshold"] = kwargs.get("grey_threshold", 0.98)
+        options["fast_docx"] = kwargs.get("fast_docx", True)
+    elif output_format == "sqlite":
+        options["fts"] = bool(kwargs.get("fts"))
+        options["fts_words"] = bool(kwargs.get("fts") and kwargs.get("fts_words"))
+    return options
+
+
+def record_manifest(output_filepath, source, digest: str, options: dict):
+    """Write the manifest of an output, from the stat and hash of its source"""
+    output = os.stat(output_filepath)
+    manifest = {
+        "version": __version__,
+        "source": {
+            "size": source.st_size,
+            "mtime_ns": source.st_mtime_ns,
+            "sha256": digest,
+        },
+        "options": options,
+        "output": {"size": output.st_size, "mtime_ns": output.st_mtime_ns},
+    }
+    manifest_path(output_filepath).write_text(json.dumps(manifest), encoding="utf-8")
+
+
+def up_to_date(output_filepath, transcript_filepath, options: dict) -> bool:
+    """Whether an output's manifest matches its source, options and version
+
+    The source is only hashed when its size or modification time has
+    changed, so unchanged files cost a couple of stat calls.
+    """
+    try:
+        with open(manifest_path(output_filepath), "r", encoding="utf-8") as file:
+            manifest = json.load(file)
+        output = os.stat(output_filepath)
+        source = os.stat(transcript_filepath)
+    except (OSError, ValueError):
+        return False
+
+    if manifest.get("version") != __version__ or manifest.get("options") != options:
+        return False
+
+    # The output has since been replaced or edited
+    if manifest.get("output") != {
+        "size": output.st_size,
+        "mtime_ns": output.st_mtime_ns,
+    }:
+        return False
+
+    recorded = manifest["source"]
+    if (recorded["size"], recorded["mtime_ns"]) == (source.st_size, source.st_mtime_ns):
+        return True
+
+    # Touched but perhaps unchanged, so compare content
+    if recorded["size"] != source.st_size:
+        return False
+    digest = file_digest(transcript_filepath)
+    if digest != recorded["sha256"]:
+        return False
+
+    # Refresh the manifest, so the next run need not hash again
+    record_manifest(output_filepath, source, digest, options)
+    return True
+
+
 def write(transcript_filepath, **kwargs):
-    """Main function, write transcript file from json"""
+    """Main function, write transcript file from json
+
+    format may be a list, in which case the json is loaded and decoded once
+    and written to each format. save_as then gives the name that each
+    format's suffix is applied to.
+
+    With incremental, outputs are skipped when a manifest beside them shows
+    they were made from the same source, options and tscribe version. With
+    quiet, nothing is printed.
+
+    transcript_filepath may instead hold the json in memory, as bytes, a
+    file object or a loaded dict. Without save_as, the output is then
+    returned as bytes, a list of them for several formats. save_as may also
+    be a binary file object, which a single format is written to.
+    """
 
     # Performance timer start
     start = perf_counter()
     logging.info("=" * 32)
     logging.debug("Started at %s", start)
-    logging.info("Source file: %s", transcript_filepath)
-    logging.debug("kwargs = %s", str(kwargs))
 
-    # Load json file as dict
-    data = load_json_as_dict(transcript_filepath)
+    # Read a file object once, leaving its json in memory
+    if hasattr(transcript_filepath, "read"):
+        transcript_filepath = transcript_filepath.read()
+        if isinstance(transcript_filepath, str):
+            transcript_filepath = transcript_filepath.encode("utf-8")
+    on_disk = is_path(transcript_filepath)
 
-    # Decode transcript
-    dataframe = decode_transcript_to_dataframe(data)
+    if on_disk:
+        logging.info("Source file: %s", transcript_filepath)
+    else:
+        logging.info("Source in memory: %s", type(transcript_filepath).__name__)
+    logging.debug("kwargs = %s", str(kwargs))
 
     # Output
-    output_format = kwargs.get("format", "docx")
+    output_formats = kwargs.get("format", "docx")
+    if isinstance(output_formats, str):
+        output_formats = [output_formats]
+    for output_format in output_formats:
+        if output_format not in OUTPUT_SUFFIXES:
+            raise Exception(
+                "Output format should be 'docx', 'csv', 'sqlite', 'vtt', 'srt',"
+                " 'parquet' or 'arrow'"
+            )
 
     # Deprecated tmp_dir by improving save_as
     if kwargs.get("tmp_dir"):
         logging.warning("tmp_dir in kwargs")
         raise Exception("tmp_dir has been deprecated, use save_as instead")
 
-    # Output to docx (default behaviour)
-    if output_format == "docx":
-        output_filepath = kwargs.get(
-            "save_as", Path(transcript_filepath).with_suffix(".docx")
-        )
-        write_docx(data, output_filepath)
+    # Where each format is written, to memory when there is no path to follow
+    to_file = hasattr(kwargs.get("save_as"), "write")
+    in_memory = "save_as" not in kwargs and not on_disk
+    if to_file and len(output_formats) > 1:
+        raise Exception("save_as should be a path when writing several formats")
 
-    # Output to CSV
-    elif output_format == "csv":
-        output_filepath = kwargs.get(
-            "save_as", Path(transcript_filepath).with_suffix(".csv")
-        )
-        dataframe.to_csv(output_filepath)
+    output_filepaths = []
+    for output_format in output_formats:
 
-    # Output to sqlite
-    elif output_format == "sqlite":
-        output_filepath = kwargs.get(
-            "save_as", Path(transcript_filepath).with_suffix(".db")
-        )
-        conn = sqlite3.connect(str(output_filepath))
-        dataframe.to_sql("transcript", conn)
-        conn.close()
+        if in_memory:
+            output_filepath = io.BytesIO()
+        elif "save_as" not in kwargs:
+            output_filepath = Path(transcript_filepath).with_suffix(
+                OUTPUT_SUFFIXES[output_format]
+            )
+        elif len(output_formats) > 1:
+            output_filepath = Path(kwargs["save_as"]).with_suffix(
+                OUTPUT_SUFFIXES[output_format]
+            )
+        else:
+            output_filepath = kwargs["save_as"]
+
+        output_filepaths.append(output_filepath)
+
+    # Leave outputs that are up to date with the source and options
+    pending = list(zip(output_formats, output_filepaths))
+    incremental = kwargs.get("incremental") and on_disk and not to_file
+    if incremental:
+        for output_format, output_filepath in list(pending):
+            options = output_options(output_format, kwargs)
+            if up_to_date(output_filepath, transcript_filepath, options):
+                if not kwargs.get("quiet"):
+                    print(f"{output_filepath} is up to date.")
+                logging.info("%s is up to date.", output_filepath)
+                pending.remove((output_format, output_filepath))
+
+    if not pending:
+        if isinstance(kwargs.get("format", "docx"), str):
+            return output_filepaths[0]
+        return output_filepaths
+
+    # Content hash of the source, shared by the manifests and the chart cache,
+    # which only a docx output consults
+    digest = source = None
+    use_cache = kwargs.get("cache") and "docx" in dict(pending)
+    if (use_cache or incremental) and on_disk:
+        source = os.stat(transcript_filepath)
+        digest = file_digest(transcript_filepath)
+    elif use_cache:
+        digest = data_digest(transcript_filepath)
+
+    # Load json file as dict, or stream it from disk
+    if kwargs.get("stream") and on_disk:
+        data = load_json_as_stream(transcript_filepath)
+    else:
+        data = load_json_as_dict(transcript_filepath, kwargs.get("json_backend"))
+
+    # Decode transcript once, shared by every writer of segments. parquet and
+    # arrow read words from the json itself, so need no decoding
+    streamed = kwargs.get("stream") and on_disk
+    transcript = dataframe = None
+    if any(x not in ("parquet", "arrow") for x in dict(pending)):
+        transcript = decode_transcript(data)
+        used = streamed
+    else:
+        used = False
+
+    # Stats and chart from the cache, skipping the chart stage when known
+    stats = chart = None
+    if use_cache:
+        cache = kwargs["cache"]
+        if not isinstance(cache, ChartCache):
+            cache = ChartCache(cache, kwargs.get("cache_size", 256 * 1024 ** 2))
+        key = cache.key(digest, max_points=5000)
+        cached = cache.get(key)
+        if cached:
+            stats, chart = cached
+        else:
+            stats = calculate_confidence_statistics(transcript)
+            chart = make_graph(stats)
+            cache.put(key, stats, chart)
+
+    for output_format, output_filepath in pending:
+
+        # The dataframe is shared by the csv and sqlite writers
+        if output_format in ("csv", "sqlite") and dataframe is None:
+            dataframe = decode_transcript_to_dataframe(transcript)
+
+        # Output to docx (default behaviour)
+        if output_format == "docx":
+            write_docx(
+                transcript,
+                output_filepath,
+                fast_docx=kwargs.get("fast_docx", True),
+                grey_threshold=kwargs.get("grey_threshold", 0.98),
+                stats=stats,
+                chart=chart,
+            )
 
-    # Output to VTT
-    elif output_format == "vtt":
-        output_filepath = kwargs.get(
-            "save_as", Path(transcript_filepath).with_suffix(".vtt")
-        )
-        write_vtt(dataframe, output_filepath)
+        # Output to CSV
+        elif output_format == "csv":
+            if hasattr(output_filepath, "write"):
+                output_filepath.write(dataframe.to_csv().encode("utf-8"))
+            else:
+                dataframe.to_csv(output_filepath)
+
+        # Output to sqlite
+        elif output_format == "sqlite":
+            write_sqlite(
+                dataframe,
+                transcript,
+                output_filepath,
+                fts=kwargs.get("fts"),
+                fts_words=kwargs.get("fts_words"),
+            )
+
+        # Output to VTT
+        elif output_format == "vtt":
+            write_vtt(transcript, output_filepath)
+
+        # Output to SRT
+        elif output_format == "srt":
+            write_srt(transcript, output_filepath)
+
+        # Output word by word to parquet or arrow, from the json itself
+        else:
+            # Streamed items are used up once read, so stream them again
+            if used:
+                data = load_json_as_stream(transcript_filepath)
+            write_words(data, output_filepath, output_format)
+            used = streamed
+
+        # Performance timer finish
+        finish = perf_counter()
+        logging.debug("Finished at %s", finish)
+        duration = round(finish - start, 2)
+
+        # Outputs in memory are named by their format
+        name = output_filepath if is_path(output_filepath) else output_format
+        if not kwargs.get("quiet"):
+            print(f"{name} written in {duration} seconds.")
+        logging.info("%s written in %s seconds.", name, duration)
+
+        # Record how the output was made, for later incremental runs
+        if incremental:
+            options = output_options(output_format, kwargs)
+            record_manifest(output_filepath, source, digest, options)
+
+    if in_memory:
+        output_filepaths = [x.getvalue() for x in output_filepaths]
+
+    if isinstance(kwargs.get("format", "docx"), str):
+        return output_filepaths[0]
+    return output_filepaths
+
+
+def warm_up(output_formats="docx"):
+    """Import the dependencies of formats and prepare their templates"""
+    logging.info("Warming up for %s", output_formats)
+
+    if isinstance(output_formats, str):
+        output_formats = [output_formats]
+
+    if "docx" in output_formats:
+        import matplotlib.figure
+        import matplotlib.backends.backend_agg
+
+        docx_template()
+    if set(output_formats) & {"csv", "sqlite"}:
+        import pandas
+    if set(output_formats) & {"parquet", "arrow"}:
+        # Optional, write_words explains if it is missing
+        try:
+            import pyarrow
+        except ImportError:
+            pass
+
+
+def write_one(transcript_filepath, kwargs: dict) -> dict:
+    """Write a single transcript, capturing any error rather than raising it"""
+    start = perf_counter()
+    result = {"source": str(transcript_filepath)}
+
+    try:
+        output = write(transcript_filepath, **kwargs)
+        if isinstance(output, list):
+            result["output"] = [str(x) for x in output]
+        else:
+            result["output"] = str(output)
+    except Exception as error:
+        logging.exception("Failed to write %s", transcript_filepath)
+        result["error"] = f"{type(error).__name__}: {error}"
+
+    result["duration"] = round(perf_counter() - start, 2)
+    return result
+
+
+def write_many(transcript_filepaths, workers: int = None, **kwargs) -> dict:
+    """Write many transcript files from json in parallel worker processes
+
+    Takes the same keyword arguments as write(), except save_as, and returns
+    a summary of the files that succeeded and failed.
+    """
+    from concurrent.futures import ProcessPoolExecutor
 
+    if kwargs.get("save_as"):
+        raise Exception("save_as is not supported when writing many files")
+
+    # Performance timer start
+    start = perf_counter()
+    transcript_filepaths = list(transcript_filepaths)
+    # No more warmed workers than there are files to give them
+    workers = max(1, min(workers or os.cpu_count() or 1, len(transcript_filepaths)))
+    logging.info("Writing %s files with %s workers", len(transcript_filepaths), workers)
+
+    # One worker runs in this process, without the overhead of a pool
+    if workers == 1:
+        warm_up(kwargs.get("format", "docx"))
+        results = [write_one(x, kwargs) for x in transcript_filepaths]
+
+    # Workers are reused across files, and warmed up once as they start
     else:
-        raise Exception("Output format should be 'docx', 'csv', 'sqlite' or 'vtt'")
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=warm_up,
+            initargs=(kwargs.get("format", "docx"),),
+        ) as executor:
+            results = list(
+                executor.map(
+                    write_one,
+                    transcript_filepaths,
+                    [kwargs] * len(transcript_filepaths),
+                )
+            )
+
+    summary = {
+        "succeeded": [x for x in results if "error" not in x],
+        "failed": [x for x in results if "error" in x],
+        "duration": round(perf_counter() - start, 2),
+    }
+
+    logging.info(
+        "%s written, %s failed in %s seconds.",
+        len(summary["succeeded"]),
+        len(summary["failed"]),
+        summary["duration"],
+    )
+    return summary
 
-    # Performance timer finish
-    finish = perf_counter()
-    logging.debug("Finished at %s", finish)
-    duration = round(finish - start, 2)
 
-    print(f"{output_filepath} written in {duration} seconds.")
-    logging.info("%s written in %s seconds.", output_filepath, duration)
+async def write_async(transcript_filepath, executor=None, **kwargs):
+    """Write transcript file from json without blocking the event loop
+
+    The conversion runs in executor, the loop's default thread pool unless
+    given. A ProcessPoolExecutor keeps cpu-bound decoding and rendering out
+    of the loop's process altogether. Takes the same keyword arguments as
+    write(), quiet by default. Cancelling stops a conversion that has not
+    started yet, one already running finishes in the executor.
+    """
+    import asyncio
+
+    kwargs.setdefault("quiet", True)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, functools.partial(write, transcript_filepath, **kwargs)
+    )
+
+
+async def write_many_async(
+    transcript_filepaths, concurrency: int = None, executor=None, **kwargs
+) -> dict:
+    """Write many transcript files from json, at most concurrency at once
+
+    Conversions run in executor as write_async() does, and a summary is
+    returned as write_many() does. Cancelling stops the conversions still
+    waiting for their turn.
+    """
+    import asyncio
+
+    if kwargs.get("save_as"):
+        raise Exception("save_as is not supported when writing many files")
+
+    # Performance timer start
+    start = perf_counter()
+    kwargs.setdefault("quiet", True)
+    semaphore = asyncio.Semaphore(concurrency or os.cpu_count() or 1)
+    loop = asyncio.get_running_loop()
+
+    async def convert(transcript_filepath):
+        async with semaphore:
+            return await loop.run_in_executor(
+                executor, write_one, transcript_filepath, kwargs
+            )
+
+    results = await asyncio.gather(*(convert(x) for x in transcript_filepaths))
+
+    summary = {
+        "succeeded": [x for x in results if "error" not in x],
+        "failed": [x for x in results if "error" in x],
+        "duration": round(perf_counter() - start, 2),
+    }
+
+    logging.info(
+        "%s written, %s failed in %s seconds.",
+        len(summary["succeeded"]),
+        len(summary["failed"]),
+        summary["duration"],
+    )
+    return summary
+
+
+def corpus_rows(transcript_filepath, stream: bool = False) -> dict:
+    """Decode a transcript into segment and word rows for the corpus database
+
+    Rows leave out the job id, which is only known once the job is inserted.
+    """
+    start = perf_counter()
+    result = {"source": str(Path(transcript_filepath).resolve())}
+
+    try:
+        if stream:
+            data = load_json_as_stream(transcript_filepath)
+        else:
+            data = load_json_as_dict(transcript_filepath)
+        transcript = decode_transcript(data)
+
+        segments, words = [], []
+        for position, segment in enumerate(transcript["segments"]):
+            speaker = segment.speaker
+            segments.append(
+                (
+                    position,
+                    segment.start_time,
+                    segment.end_time,
+                    speaker,
+                    " ".join(x.content + x.punctuation for x in segment.words),
+                )
+            )
+            words.extend(
+                (
+                    position,
+                    x.start_time,
+                    x.end_time,
+                    speaker,
+                    x.content,
+                    x.confidence,
+                    x.punctuation,
+                )
+                for x in segment.words
+            )
+
+        result.update(job_name=transcript["job_name"], segments=segments, words=words)
+
+    except Exception as error:
+        logging.exception("Failed to decode %s", transcript_filepath)
+        result["error"] = f"{type(error).__name__}: {error}"
+
+    result["duration"] = perf_counter() - start
+    return result
+
+
+def write_corpus(
+    transcript_filepaths, database, workers: int = None, batch_size: int = 100, **kwargs
+) -> dict:
+    """Append many transcripts to a single sqlite database
+
+    Transcripts are decoded in parallel worker processes and inserted by this
+    one, batch_size transcripts per transaction. Ingesting a file again
+    replaces its earlier rows. Takes stream as write() does, and returns a
+    summary as write_many() does.
+
+    With fts, segments_fts is kept as a full-text index of segment comments,
+    and with fts_words as well words_fts indexes each word, whose timestamps
+    are found by joining words on rowid.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Performance timer start
+    start = perf_counter()
+    transcript_filepaths = list(transcript_filepaths)
+    # No more warmed workers than there are files to give them
+    workers = max(1, min(workers or os.cpu_count() or 1, len(transcript_filepaths)))
+    logging.info(
+        "Ingesting %s files into %s with %s workers",
+        len(transcript_filepaths),
+        database,
+        workers,
+    )
+
+    # Autocommit, so transactions are opened and closed explicitly per batch
+    conn = sqlite3.connect(str(database), isolation_level=None)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -65536")
+    conn.executescript(CORPUS_SCHEMA)
+
+    # Full-text indexes requested, each indexing its table as it is created,
+    # and those of earlier runs, which must stay in step with their tables
+    existing = {x[0] for x in conn.execute("SELECT name FROM sqlite_master")}
+    requested = {
+        "segments_fts": kwargs.get("fts"),
+        "words_fts": kwargs.get("fts") and kwargs.get("fts_words"),
+    }
+    fts = []
+    for index, table, column in [
+        ("segments_fts", "segments", "comment"),
+        ("words_fts", "words", "content"),
+    ]:
+        if index in existing:
+            fts.append((index, table, column))
+        elif requested[index]:
+            conn.execute(CORPUS_FTS[index])
+            conn.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
+            fts.append((index, table, column))
+
+    def insert(rows):
+        """Insert one transcript's rows, replacing any earlier ingestion"""
+        replaced = "(SELECT id FROM jobs WHERE source = ?)"
+        for index, table, column in fts:
+            conn.execute(
+                f"INSERT INTO {index} ({index}, rowid, {column}) SELECT 'delete',"
+                f" rowid, {column} FROM {table} WHERE job_id IN {replaced}",
+                (rows["source"],),
+            )
+        for table in ("words", "segments", "jobs"):
+            column = "id" if table == "jobs" else "job_id"
+            conn.execute(
+                f"DELETE FROM {table} WHERE {column} IN {replaced}",
+                (rows["source"],),
+            )
+        job_id = conn.execute(
+            "INSERT INTO jobs (job_name, source, ingested_at) VALUES (?, ?, ?)",
+            (
+                rows["job_name"],
+                rows["source"],
+                datetime.datetime.now().isoformat(timespec="seconds"),
+            ),
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO segments VALUES (?, ?, ?, ?, ?, ?)",
+            ((job_id,) + x for x in rows["segments"]),
+        )
+        conn.executemany(
+            "INSERT INTO words VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            ((job_id,) + x for x in rows["words"]),
+        )
+        for index, table, column in fts:
+            conn.execute(
+                f"INSERT INTO {index} (rowid, {column})"
+                f" SELECT rowid, {column} FROM {table} WHERE job_id = ?",
+                (job_id,),
+            )
+
+    def ingest(decoded):
+        """Insert decoded transcripts as they arrive, in batched transactions"""
+        results = []
+        pending = 0
+        conn.execute("BEGIN")
+        for transcript_filepath, rows in zip(transcript_filepaths, decoded):
+            if "error" not in rows:
+                insert(rows)
+                pending += 1
+                if pending == batch_size:
+                    conn.execute("COMMIT")
+                    conn.execute("BEGIN")
+                    pending = 0
+            result = {"source": str(transcript_filepath)}
+            if "error" in rows:
+                result["error"] = rows["error"]
+            else:
+                result["output"] = str(database)
+            result["duration"] = round(rows["duration"], 2)
+            results.append(result)
+        conn.execute("COMMIT")
+        return results
+
+    try:
+        stream = [kwargs.get("stream", False)] * len(transcript_filepaths)
+
+        # One worker decodes in this process, without the overhead of a pool
+        if workers == 1:
+            results = ingest(map(corpus_rows, transcript_filepaths, stream))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = ingest(
+                    executor.map(corpus_rows, transcript_filepaths, stream)
+                )
+
+        conn.executescript(CORPUS_INDEXES)
+        conn.execute("PRAGMA optimize")
+
+    finally:
+        conn.close()
+
+    summary = {
+        "succeeded": [x for x in results if "error" not in x],
+        "failed": [x for x in results if "error" in x],
+        "duration": round(perf_counter() - start, 2),
+    }
+
+    logging.info(
+        "%s ingested, %s failed in %s seconds.",
+        len(summary["succeeded"]),
+        len(summary["failed"]),
+        summary["duration"],
+    )
+    return summary
@@ -0,0 +1,7 @@
+""" Run the command line interface with python -m tscribe. """
+
+import sys
+
+from tscribe.cli import main
+
+sys.exit(main())
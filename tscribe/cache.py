@@ -0,0 +1,119 @@
+""" On-disk cache of confidence statistics and charts, keyed by transcript content. """
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+
+# Bump when the cached stats or chart would change for the same transcript
+CACHE_VERSION = 2
+
+
+def file_digest(filepath) -> str:
+    """sha256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def data_digest(data) -> str:
+    """sha256 of json bytes, or of a loaded dict in a canonical form"""
+    if isinstance(data, dict):
+        data = json.dumps(data, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+class ChartCache:
+    """Stats and rendered charts in a directory, evicting least recently used
+
+    Each entry is a pair of files, KEY.json for the stats and KEY.png for the
+    chart. Reading an entry touches it, so eviction by modification time
+    removes whatever has gone unused longest once the directory passes
+    max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes: int = 256 * 1024 ** 2):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def key(self, digest: str, **params) -> str:
+        """Key of a transcript's content digest and the rendering parameters"""
+        material = json.dumps([CACHE_VERSION, digest, params], sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """Return (stats, chart png bytes), or None when not cached"""
+        stats_path = self.directory / f"{key}.json"
+        chart_path = self.directory / f"{key}.png"
+
+        try:
+            stats = json.loads(stats_path.read_text(encoding="utf-8"))
+            chart = chart_path.read_bytes()
+        except (OSError, ValueError):
+            logging.debug("Chart cache miss for %s", key)
+            return None
+
+        # json keys are strings, the percentiles are keyed by number
+        stats["percentiles"] = {int(x): y for x, y in stats["percentiles"].items()}
+
+        # Mark as recently used
+        for path in (stats_path, chart_path):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+        logging.debug("Chart cache hit for %s", key)
+        return stats, chart
+
+    def put(self, key: str, stats: dict, chart: bytes):
+        """Store stats and chart, then evict down to max_bytes"""
+        # Chart first, so an entry is only readable once both files exist
+        self._write(self.directory / f"{key}.png", chart)
+        self._write(
+            self.directory / f"{key}.json", json.dumps(stats).encode("utf-8")
+        )
+        logging.debug("Chart cache stored %s", key)
+        self.evict()
+
+    def _write(self, path: Path, data: bytes):
+        """Write via a temporary file, so concurrent readers never see half a file"""
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    def evict(self):
+        """Remove least recently used entries until within max_bytes"""
+        entries = {}
+        for path in self.directory.iterdir():
+            if path.suffix not in (".json", ".png"):
+                continue
+            try:
+                status = path.stat()
+            except OSError:
+                continue
+            size, used = entries.get(path.stem, (0, 0))
+            entries[path.stem] = (size + status.st_size, max(used, status.st_mtime))
+
+        total = sum(size for size, _ in entries.values())
+        for key, (size, _) in sorted(entries.items(), key=lambda x: x[1][1]):
+            if total <= self.max_bytes:
+                break
+            logging.debug("Chart cache evicting %s", key)
+            for suffix in (".json", ".png"):
+                try:
+                    os.remove(self.directory / f"{key}{suffix}")
+                except OSError:
+                    pass
+            total -= size
@@ -0,0 +1,190 @@
+""" Command line interface, converting files, directories or globs in bulk. """
+
+import argparse
+import glob
+import json
+import logging
+import sys
+from pathlib import Path
+
+import tscribe
+
+
+def find_transcripts(inputs: list) -> list:
+    """Expand files, directories and glob patterns into json files, in order"""
+    found = []
+
+    for pattern in inputs:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = sorted(str(x) for x in path.glob("*.json"))
+        elif path.is_file():
+            matches = [pattern]
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True))
+            if not matches:
+                logging.warning("No transcripts match %s", pattern)
+
+        for match in matches:
+            if match not in found:
+                found.append(match)
+
+    return found
+
+
+def output_formats(value: str) -> list:
+    """Comma-separated output formats, checked against those supported"""
+    formats = [x.strip() for x in value.split(",") if x.strip()]
+    for output_format in formats:
+        if output_format not in tscribe.OUTPUT_SUFFIXES:
+            choices = ", ".join(tscribe.OUTPUT_SUFFIXES)
+            raise argparse.ArgumentTypeError(
+                f"invalid format: '{output_format}' (choose from {choices})"
+            )
+    return formats
+
+
+def parse_args(argv: list = None):
+    """Command line arguments"""
+    parser = argparse.ArgumentParser(
+        prog="tscribe",
+        description="Produce Word Document, CSV, SQLite, VTT and SRT transcriptions "
+        "from AWS Transcribe json files.",
+    )
+    parser.add_argument(
+        "inputs", nargs="+", help="json files, directories of them, or glob patterns"
+    )
+    # One value per flag, so the formats never swallow the inputs after them
+    parser.add_argument(
+        "-f",
+        "--format",
+        action="append",
+        type=output_formats,
+        help="output formats, comma-separated or repeated, e.g. -f csv,vtt"
+        " (default: docx)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of worker processes (default: one per core)",
+    )
+    parser.add_argument(
+        "--skip-existing",
+        action="store_true",
+        help="skip outputs that already exist",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="rebuild only outputs whose source, options or version changed",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="stream json from disk rather than loading it whole",
+    )
+    parser.add_argument(
+        "--corpus",
+        metavar="DATABASE",
+        help="append every transcript to one sqlite DATABASE, instead of formats",
+    )
+    parser.add_argument(
+        "--fts",
+        action="store_true",
+        help="build a full-text index of segments in sqlite outputs",
+    )
+    parser.add_argument(
+        "--fts-words",
+        action="store_true",
+        help="with --fts, index each word and its timestamps too",
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="DIR",
+        help="reuse confidence statistics and charts cached in DIR across runs",
+    )
+    parser.add_argument(
+        "--report",
+        metavar="PATH",
+        help="write a json timing report to PATH",
+    )
+    args = parser.parse_args(argv)
+
+    # Flatten repeated flags, keeping the first mention of each format
+    formats = [x for value in args.format or [["docx"]] for x in value]
+    args.format = list(dict.fromkeys(formats))
+    return args
+
+
+def main(argv: list = None) -> int:
+    """Entry point for the tscribe command"""
+    args = parse_args(argv)
+    transcripts = find_transcripts(args.inputs)
+
+    report = {"succeeded": [], "failed": [], "skipped": [], "duration": 0.0}
+
+    # Group transcripts by the formats they still need, so each group is
+    # loaded and decoded once for all of its formats
+    groups = {}
+    for transcript in transcripts if not args.corpus else []:
+        output_formats = []
+        for output_format in args.format:
+            suffix = tscribe.OUTPUT_SUFFIXES[output_format]
+            output = Path(transcript).with_suffix(suffix)
+            if args.skip_existing and output.exists():
+                report["skipped"].append(str(output))
+            elif args.incremental and tscribe.up_to_date(
+                output, transcript, tscribe.output_options(output_format, vars(args))
+            ):
+                report["skipped"].append(str(output))
+            else:
+                output_formats.append(output_format)
+        if output_formats:
+            groups.setdefault(tuple(output_formats), []).append(transcript)
+
+    for output_formats, pending in groups.items():
+        options = {
+            "format": list(output_formats),
+            "stream": args.stream,
+            "incremental": args.incremental,
+            "fts": args.fts,
+            "fts_words": args.fts_words,
+        }
+        if args.cache:
+            options["cache"] = args.cache
+        summary = tscribe.write_many(pending, workers=args.jobs, **options)
+        report["succeeded"] += summary["succeeded"]
+        report["failed"] += summary["failed"]
+        report["duration"] = round(report["duration"] + summary["duration"], 2)
+
+    if args.corpus and transcripts:
+        summary = tscribe.write_corpus(
+            transcripts,
+            args.corpus,
+            workers=args.jobs,
+            stream=args.stream,
+            fts=args.fts,
+            fts_words=args.fts_words,
+        )
+        report.update(summary)
+
+    succeeded = len(report["succeeded"])
+    failed = len(report["failed"])
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    print(
+        f"{succeeded} written, {len(report['skipped'])} skipped, {failed} failed"
+        f" in {report['duration']} seconds.",
+        file=sys.stderr,
+    )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+""" Compact records of a decoded transcript. """
+
+
+class Record:
+    """Fixed fields held in __slots__, also readable like the dicts they replace"""
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def keys(self):
+        return self.__slots__
+
+    def __eq__(self, other):
+        if isinstance(other, dict):
+            return dict(self) == other
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, x) == getattr(other, x) for x in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{x}={getattr(self, x)!r}" for x in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Word(Record):
+    """A pronounced word, from its most confident alternative, and its punctuation"""
+
+    __slots__ = ("content", "confidence", "start_time", "end_time", "punctuation")
+
+    def __init__(
+        self,
+        content: str,
+        confidence: float,
+        start_time: float,
+        end_time: float,
+        punctuation: str = "",
+    ):
+        self.content = content
+        self.confidence = confidence
+        self.start_time = start_time
+        self.end_time = end_time
+        self.punctuation = punctuation
+
+
+class Segment(Record):
+    """Consecutive words of a single speaker or channel"""
+
+    __slots__ = ("start_time", "end_time", "speaker", "words")
+
+    def __init__(self, start_time: float, end_time: float, speaker: str, words: list):
+        self.start_time = start_time
+        self.end_time = end_time
+        self.speaker = speaker
+        self.words = words
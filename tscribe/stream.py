@@ -0,0 +1,198 @@
+""" Incremental reading of large AWS Transcribe json files. """
+
+import json
+import logging
+import re
+
+
+NOT_WHITESPACE = re.compile(r"[^ \t\n\r]")
+# Numbers have no closing character, so end at the next delimiter
+NUMBER_END = re.compile(r"[,\]} \t\n\r]")
+
+
+class JSONStreamReader:
+    """Pull values out of a json text file without loading the whole document"""
+
+    def __init__(self, file, chunk_size: int = 1 << 16):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self, size: int = None) -> bool:
+        """Read more of the file into the buffer, False once exhausted"""
+        if self.eof:
+            return False
+
+        # Drop what has already been consumed so the buffer stays bounded
+        if self.pos > self.chunk_size:
+            self.buffer = self.buffer[self.pos :]
+            self.pos = 0
+
+        chunk = self.file.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+
+        self.buffer += chunk
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, empty at end of file"""
+        while True:
+            match = NOT_WHITESPACE.search(self.buffer, self.pos)
+            if match:
+                self.pos = match.start()
+                return self.buffer[self.pos]
+            self.pos = len(self.buffer)
+            if not self.fill():
+                return ""
+
+    def expect(self, character: str):
+        """Consume the next non-whitespace character, which must be character"""
+        found = self.peek()
+        if found != character:
+            raise ValueError(f"Expected {character!r} but found {found!r}")
+        self.pos += 1
+
+    def read_value(self):
+        """Decode the next complete json value"""
+        character = self.peek()
+
+        # A number may continue in the next chunk, so read up to its delimiter
+        if character in "-0123456789":
+            while not NUMBER_END.search(self.buffer, self.pos) and self.fill():
+                pass
+
+        while True:
+            try:
+                value, self.pos = self.decoder.raw_decode(self.buffer, self.pos)
+                return value
+            except json.JSONDecodeError:
+                # Grow geometrically so long values are not re-scanned per chunk
+                if self.fill(max(self.chunk_size, len(self.buffer) - self.pos)):
+                    continue
+                raise
+
+    def iter_object(self):
+        """Yield each key of an object, the caller consumes the value in between"""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+
+        while True:
+            key = self.read_value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("}")
+            return
+
+    def iter_array(self):
+        """Yield each index of an array, the caller consumes the value in between"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+
+        index = 0
+        while True:
+            yield index
+            index += 1
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("]")
+            return
+
+    def skip_value(self):
+        """Step over the next value
+
+        Containers that fit in the buffer are decoded whole and discarded, which
+        is far quicker than stepping through them. Larger ones are stepped
+        through, so memory stays bounded by the buffer size.
+        """
+        character = self.peek()
+        if character not in ("{", "["):
+            self.read_value()
+            return
+
+        if len(self.buffer) - self.pos < self.chunk_size:
+            self.fill()
+        try:
+            _, self.pos = self.decoder.raw_decode(self.buffer, self.pos)
+            return
+        except json.JSONDecodeError:
+            pass
+
+        if character == "{":
+            for _ in self.iter_object():
+                self.skip_value()
+        else:
+            for _ in self.iter_array():
+                self.skip_value()
+
+
+def walk(reader: JSONStreamReader, path: tuple, indices: tuple = ()):
+    """Yield (indices, value) for each value at path below the reader's position"""
+    if not path:
+        yield indices, reader.read_value()
+        return
+
+    key, rest = path[0], path[1:]
+
+    # None matches every element of an array
+    if key is None:
+        if reader.peek() != "[":
+            reader.skip_value()
+            return
+        for index in reader.iter_array():
+            yield from walk(reader, rest, indices + (index,))
+
+    else:
+        if reader.peek() != "{":
+            reader.skip_value()
+            return
+        for name in reader.iter_object():
+            if name == key:
+                yield from walk(reader, rest, indices)
+            else:
+                reader.skip_value()
+
+
+def iter_json_path(filepath, path: tuple):
+    """Stream (indices, value) pairs found at path in a json file
+
+    Path elements are object keys, or None to match every element of an array.
+    Indices holds the array position for each None in path.
+    """
+    logging.debug("Streaming %s from %s", "/".join(map(str, path)), filepath)
+
+    with open(filepath, "r", encoding="utf-8") as file:
+        yield from walk(JSONStreamReader(file), path)
+
+
+def read_outline(filepath, depth: int = 2) -> dict:
+    """Read scalars and object keys down to depth, skipping everything deeper
+
+    Containers below depth, and arrays at any level, are returned as None.
+    """
+
+    def outline(reader, remaining):
+        character = reader.peek()
+        if character == "{" and remaining > 0:
+            return {
+                name: outline(reader, remaining - 1) for name in reader.iter_object()
+            }
+        if character in ("{", "["):
+            reader.skip_value()
+            return None
+        return reader.read_value()
+
+    with open(filepath, "r", encoding="utf-8") as file:
+        return outline(JSONStreamReader(file), depth)